@@ -8,6 +8,7 @@ class Component():
     TYPE_PAD_BUTTON   = 4
     TYPE_MOUSE_BUTTON = 5
     TYPE_PAD_AXIS     = 6
+    TYPE_TWEEN        = 7
 
 
     # ------------------------------------
@@ -1,9 +1,17 @@
-import array
-
-
 # @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
 # @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+import array
+import math
+
 from .component import Component
+from .gfx_store import GfxStore
+from ..gpu.fsgpu_main import FsGpuMain
+
+# NumPy is optional : it is only needed for the vectorised batch transforms
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Gfx(Component):
@@ -19,28 +27,145 @@ class Gfx(Component):
     TYPE_RECTANGLE = 3
     TYPE_OVAL      = 4
     TYPE_FONT      = 5
+    TYPE_PATH      = 6
+
+    # ------------------------------------
+    #  PLACEMENT (class of pages in the GPU file system)
+    # ------------------------------------
+    PLACEMENT_DYNAMIC   = FsGpuMain.PLACEMENT_DYNAMIC
+    PLACEMENT_STATIC    = FsGpuMain.PLACEMENT_STATIC
+    PLACEMENT_TRANSIENT = FsGpuMain.PLACEMENT_TRANSIENT
+    # The static and dynamic Gfx are migrated automatically according to
+    # their write frequency, measured over a period (number of frames) :
+    # - a static Gfx written in more than STATIC_MAX_WRITE_RATIO of the frames becomes dynamic
+    # - a dynamic Gfx not written at all during the period becomes static
+    # The transient Gfx and the Gfx animated by the shader (extensions) are never
+    # migrated. This policy is disabled by default (a migration rewrites the block)
+    AUTO_PLACEMENT          = False
+    PLACEMENT_PERIOD        = 120
+    STATIC_MAX_WRITE_RATIO  = 0.1
+
+    # ------------------------------------
+    #  TEXEL GROUPS (dirty mask of the modified values)
+    # ------------------------------------
+    # Each setter only marks the texels (4 values) it has modified,
+    # so only these texels are copied into the GPU texture
+    DIRTY_COLOR     = 1 << 0    # id 0-3   : R-G-B-A
+    DIRTY_POSITION  = 1 << 1    # id 4-7   : X-Y-W-H
+    DIRTY_TRANSFORM = 1 << 2    # id 8-11  : SCALE-ANGLE-VISIBILITY ON/TOTAL
+    DIRTY_ANCHOR    = 1 << 3    # id 12-15 : AUTO-ROTATION-TYPE-ANCHOR X/Y
+    DIRTY_ZFLIP     = 1 << 4    # id 16-19 : Z-INDEX-FLIP X/Y-EXTENSIONS
+    DIRTY_PAYLOAD   = 0xE0      # id 20-.. : type specific values and extensions
+
+    # ------------------------------------
+    #  EXTENSIONS (optional values evaluated by the shader from the system time)
+    # ------------------------------------
+    # The id 19 stores the flags of the enabled extensions (bits 0-7) and the position
+    # of their values in texels (from bit 8) : the values of the enabled extensions
+    # are stored after the type specific values, in this order (flag, number of values).
+    # The shader uses the same layout
+    EXT_MOTION      = 1 << 0    # VX-VY-AX-AY, START TIME
+    EXT_ANIMATION   = 1 << 1    # FIRST TEXTURE ID-NB FRAMES-FPS-LOOP MODE, START TIME
+    EXT_PATH        = 1 << 2    # PATH TYPE-SPEED-PHASE-START TIME, RADIUS X/Y-PARAM 0/1
+    EXT_TWEEN_SCALE = 1 << 3    # END SCALE-EASING-START TIME-DURATION
+    EXT_TWEEN_ANGLE = 1 << 4    # END ANGLE-EASING-START TIME-DURATION
+    EXT_TWEEN_ALPHA = 1 << 5    # END ALPHA-EASING-START TIME-DURATION
+    EXT_TWEEN_COLOR = 1 << 6    # END R-G-B-EASING, START TIME-DURATION-(2 unused)
+    EXTENSIONS      = [(EXT_MOTION     , 8),
+                       (EXT_ANIMATION  , 8),
+                       (EXT_PATH       , 8),
+                       (EXT_TWEEN_SCALE, 4),
+                       (EXT_TWEEN_ANGLE, 4),
+                       (EXT_TWEEN_ALPHA, 4),
+                       (EXT_TWEEN_COLOR, 8),
+                      ]
+    # Tweened values of the header (first id, number of values, dirty mask) :
+    # the header value is the start value of the tween
+    TWEEN_VALUES    = {EXT_TWEEN_SCALE: (8, 1, DIRTY_TRANSFORM),
+                       EXT_TWEEN_ANGLE: (9, 1, DIRTY_TRANSFORM),
+                       EXT_TWEEN_ALPHA: (3, 1, DIRTY_COLOR    ),
+                       EXT_TWEEN_COLOR: (0, 3, DIRTY_COLOR    ),
+                      }
+
+    # ------------------------------------
+    #  EASING FUNCTIONS (EXT_TWEEN_*)
+    # ------------------------------------
+    EASE_LINEAR       = 0
+    EASE_IN_QUAD      = 1
+    EASE_OUT_QUAD     = 2
+    EASE_IN_OUT_QUAD  = 3
+    EASE_IN_CUBIC     = 4
+    EASE_OUT_CUBIC    = 5
+    EASE_IN_OUT_CUBIC = 6
+    EASE_IN_OUT_SINE  = 7
+    EASE_OUT_BACK     = 8
+
+    # ------------------------------------
+    #  PATH TYPES (EXT_PATH)
+    # ------------------------------------
+    PATH_CIRCLE     = 0
+    PATH_ELLIPSE    = 1
+    PATH_RECTANGLE  = 2
+    PATH_LISSAJOUS  = 3
+    PATH_POLYLINE   = 4
+    DIRTY_ALL       = GfxStore.MASK_ALL
 
     # ------------------------------------
     #  LOADER
     # ------------------------------------
     _loader = None
     _fsgpu  = None
+    # Current system time (same value as the shader one), set by the Gfx system
+    _systemTime = 0.0
+    # All the Gfx instances (blockID => Gfx)
+    _gfxByBlockID = {}
 
     @staticmethod
     def setLoader(loader):
         Gfx._loader = loader
 
+    @staticmethod
+    def setSystemTime(systemTime):
+        Gfx._systemTime = systemTime
+    @staticmethod
+    def getSystemTime():
+        return Gfx._systemTime
+
     @staticmethod
     def setFsGPU(fsgpu):
         Gfx._fsgpu = fsgpu
+        fsgpu.addRelocationCallback(Gfx._relocateBlocks)
+        fsgpu.addRelocationCallback(GfxPath._relocateBlocks)
+
+    # Called by the FS GPU when blocks have been moved (old blockID => new blockID)
+    # The vertex buffer of the GfxSystem is built from the block IDs of the Gfx instances
+    # so the Gfx system is notified too (through the scene)
+    @staticmethod
+    def _relocateBlocks(relocations):
+        # Remove all the old IDs first, as a new ID can be the old ID of another moved block
+        moved = []
+        for old in relocations:
+            gfx = Gfx._gfxByBlockID.pop(old, None)
+            if gfx != None:
+                moved.append(gfx)
+                gfx._blockID = relocations[old]
+                gfx._store.setBlockID(gfx._slot, gfx._blockID)
+        for gfx in moved:
+            Gfx._gfxByBlockID[gfx._blockID] = gfx
+            scn = gfx.getScene()
+            if scn != None:
+                scn.notifyChangeBlockID(gfx)
 
 
     # ------------------------------------
     #  SLOTS
     # ------------------------------------
     __slots__ = ['_blockID',
-                 '_writeToFS',
+                 '_store',
+                 '_slot',
                  '_data',
+                 '_placement',
+                 '_path',
                 ]
 
     # ------------------------------------
@@ -66,14 +191,22 @@ class Gfx(Component):
                  gfxType=TYPE_SPRITE,
                  blockID=0,
                  name="Gfx",
+                 placement=PLACEMENT_DYNAMIC,
                  ):
         # Call to mother class constructor
         super().__init__(Component.TYPE_GFX, name)
 
         # FS GPU data
         self._blockID   = blockID
-        self._writeToFS = True
-        self._data = array.array("f", [0.0, ] * int(dataSize))
+        Gfx._gfxByBlockID[blockID] = self
+        # Placement hint
+        self._placement = placement
+        # Polyline of the path extension (GfxPath)
+        self._path      = None
+        # The values are stored in the Gfx store of this data size
+        # (self._data is a view on the slot row)
+        self._store = GfxStore.getStore(dataSize)
+        self._slot  = self._store.add(self, blockID)
 
         # id = 0-1-2-3 for R-G-B-A
         self.setColor(filterColor)
@@ -101,6 +234,7 @@ class Gfx(Component):
         # id = 17-18 for FLIPX/FLIPY
         self.setFlipX(flipX)
         self.setFlipY(flipY)
+        # id = 19 for EXTENSION flags and position (none)
 
     # ------------------------------------
     #  FS GPU
@@ -111,6 +245,74 @@ class Gfx(Component):
         return Gfx._fsgpu
     def getGfxType(self):
         return self._data[13]
+    def getDataSize(self):
+        return len(self._data)
+    def getStore(self):
+        return self._store
+    def getSlot(self):
+        return self._slot
+    # The modified texels will be copied into the FS GPU during the next flush
+    # (the dirty mask of the slot is the only per-frame work of a modified Gfx)
+    def _setDirty(self, mask):
+        self._store.setDirty(self._slot, mask)
+    def getPlacement(self):
+        return self._placement
+    # Move the block into the pages of another placement class
+    # The new block ID is received through the relocation callback
+    def setPlacement(self, placement):
+        if placement == self._placement:
+            return
+        self._placement = placement
+        blockID = self._blockID
+        Gfx._fsgpu.migrate(self._blockID, placement)
+        # The data may not have been copied (no local FS buffer) :
+        # the new block is written before it can be rendered
+        if self._blockID != blockID:
+            self._writeBlock()
+    # The block and the slot of the store are released : the Gfx must not be used
+    # anymore. It must not be rendered either (removed from its entity or scene)
+    def release(self):
+        if self._store == None:
+            raise RuntimeError(f"[ERROR] the Gfx {self._blockID} has ALREADY been released !")
+        if self.getScene() != None:
+            raise RuntimeError(f"[ERROR] the Gfx {self._blockID} cannot be released as it is still in a scene !")
+        if self._path != None:
+            self._path._removeUser(self)
+            self._path = None
+        if Gfx._gfxByBlockID.get(self._blockID) is self:
+            del Gfx._gfxByBlockID[self._blockID]
+        Gfx._fsgpu.free(self._blockID)
+        # The dirty mask of the slot is cleared : nothing is written into the old block
+        self._store.remove(self._slot)
+        self._store = None
+        self._slot  = -1
+        self._data  = None
+    # Copy all the values into the block right away (and not during the next flush) :
+    # without the local FS buffer, a new block has no data in the texture yet
+    def _writeBlock(self):
+        Gfx._fsgpu.write2Texture(self._blockID, self._data)
+        self._store.clearDirty(self._slot)
+
+    # Change the number of values of this Gfx (e.g. a text message that grows).
+    # The block is resized in place when possible, else it is moved by the FS GPU,
+    # and the new block ID is received through the relocation callback.
+    # Existing values are kept, new ones are set to 0. The block is written
+    # at once, as it can be rendered before the next flush
+    def setDataSize(self, dataSize):
+        dataSize = int(dataSize)
+        if dataSize < Gfx.HEADER_SIZE:
+            raise RuntimeError(f"[ERROR] the data size of a Gfx cannot be less than the header size ! dataSize={dataSize}")
+        if dataSize == len(self._data):
+            return
+        Gfx._fsgpu.realloc(self._blockID, dataSize)
+        # Move the values into the store of the new size
+        store, slot, data = self._store, self._slot, self._data
+        self._store = GfxStore.getStore(dataSize)
+        self._slot  = self._store.add(self, self._blockID)
+        L = min(len(data), dataSize)
+        self._data[:L] = data[:L]
+        store.remove(slot)
+        self._writeBlock()
 
     # ------------------------------------
     #  POSITION (in pixels)
@@ -125,29 +327,29 @@ class Gfx(Component):
         return (self._data[4], self._data[5], self._data[9])
     def setX(self, v):
         self._data[4] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
     def setY(self, v):
         self._data[5] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
     def setPosition(self, x, y):
         self._data[4] = x
         self._data[5] = y
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
     def moveX(self, dx):
         self._data[4] += dx
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
     def moveY(self, dy):
         self._data[5] += dy
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
     def movePosition(self, dx, dy):
         self._data[4] += dx
         self._data[5] += dy
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
     def setTransform(self, x, y, ang):
         self._data[4] = x
         self._data[5] = y
         self._data[9] = ang
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION | Gfx.DIRTY_TRANSFORM)
 
     # ------------------------------------
     #  DIMENSIONS (in pixels, cannotbe modified directly)
@@ -158,10 +360,10 @@ class Gfx(Component):
         return self._data[7]
     def setW(self, v):
         self._data[6] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
     def setH(self, v):
         self._data[7] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_POSITION)
 
     # ------------------------------------
     #  FILTER COLOR (0-255 values)
@@ -176,7 +378,7 @@ class Gfx(Component):
         self._data[1]   = v[1]
         self._data[2]   = v[2]
         self._data[3]   = alpha
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_COLOR)
 
     # ------------------------------------
     #  SCALE
@@ -185,7 +387,7 @@ class Gfx(Component):
         return self._data[8]
     def setScale(self, v):
         self._data[8] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_TRANSFORM)
 
     # ------------------------------------
     #  ANGLE (in degrees)
@@ -196,10 +398,10 @@ class Gfx(Component):
         return self._data[12]
     def setAngle(self, v):
         self._data[9] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_TRANSFORM)
     def setAutoRotate(self, v):
         self._data[12] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
 
     # ------------------------------------
     #  VISIBILITY (ON period and TOTAL period)
@@ -209,13 +411,13 @@ class Gfx(Component):
     def setVisibility(self, on, total):
         self._data[10] = on
         self._data[11] = total
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_TRANSFORM)
     def show(self):
         self._data[10] = self._data[11]
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_TRANSFORM)
     def hide(self):
         self._data[10] = 0
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_TRANSFORM)
 
     # ------------------------------------
     #  ANCHOR
@@ -229,34 +431,35 @@ class Gfx(Component):
     def setAnchor(self, x, y):
         self._data[14] = x
         self._data[15] = y
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorX(self, v):
         self._data[14] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorY(self, v):
         self._data[15] = v
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorLeft(self):
         self._data[14] = -1
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorCenterX(self):
         self._data[14] = 0
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorRight(self):
         self._data[14] = 1
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorTop(self):
         self._data[15] = -1
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorCenterY(self):
         self._data[15] = 0
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorBottom(self):
         self._data[15] = 1
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
     def setAnchorCenter(self):
         self._data[14] = 0
         self._data[15] = 0
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ANCHOR)
 
     # ------------------------------------
     #  Z-INDEX
@@ -265,7 +468,7 @@ class Gfx(Component):
         return self._data[16]
     def setZIndex(self, v):
         self._data[16] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ZFLIP)
         # We have to notify the change of Z Index to the Gfx system
         # We get the entity and the scene to do it
         scn = self.getScene()
@@ -282,22 +485,519 @@ class Gfx(Component):
     def setFlipX(self, v):
         v = 1.0 if v else 0.0
         self._data[17] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ZFLIP)
     def setFlipY(self, v):
         v = 1.0 if v else 0.0
         self._data[18] = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_ZFLIP)
+
+    # ------------------------------------
+    #  EXTENSIONS
+    # ------------------------------------
+    def getExtensions(self):
+        return int(self._data[19]) & 0xFF
+    def hasExtension(self, ext):
+        return (int(self._data[19]) & ext) != 0
+
+    # Number of values before the extension values
+    def _getBaseSize(self):
+        flags = self.getExtensions()
+        size  = len(self._data)
+        for e, n in Gfx.EXTENSIONS:
+            if flags & e:
+                size -= n
+        return size
+
+    # Position of the extension values in the data (from the enabled extensions)
+    def _getExtensionOffset(self, ext):
+        flags  = self.getExtensions()
+        offset = self._getBaseSize()
+        for e, size in Gfx.EXTENSIONS:
+            if e == ext:
+                break
+            if flags & e:
+                offset += size
+        return offset
+
+    # The shader needs the flags and the position (in texels) of the extension values
+    def _setExtensions(self, flags, baseSize):
+        if baseSize % 4 != 0:
+            raise RuntimeError(f"[ERROR] the extension values of a Gfx must be aligned on texels ! baseSize={baseSize}")
+        self._data[19] = flags | ((baseSize // 4) << 8) if flags != 0 else 0
+
+    # Insert the values of the extension (set to 0) : the block grows and
+    # the values of the next extensions are moved. It returns their position
+    def _enableExtension(self, ext):
+        offset = self._getExtensionOffset(ext)
+        if self.hasExtension(ext):
+            return offset
+        size = dict(Gfx.EXTENSIONS)[ext]
+        base = self._getBaseSize()
+        tail = [float(v) for v in self._data[offset:]]
+        self.setDataSize(len(self._data) + size)
+        for i in range(len(tail)):
+            self._data[offset + size + i] = tail[i]
+        for i in range(size):
+            self._data[offset + i] = 0.0
+        self._setExtensions(self.getExtensions() | ext, base)
+        self._setDirty(Gfx.DIRTY_ALL)
+        return offset
+
+    # Remove the values of the extension : the block shrinks
+    def _disableExtension(self, ext):
+        if not self.hasExtension(ext):
+            return
+        offset = self._getExtensionOffset(ext)
+        size   = dict(Gfx.EXTENSIONS)[ext]
+        base   = self._getBaseSize()
+        tail   = [float(v) for v in self._data[offset + size:]]
+        for i in range(len(tail)):
+            self._data[offset + i] = tail[i]
+        self._setExtensions(self.getExtensions() & ~ext, base)
+        self.setDataSize(len(self._data) - size)
+        self._setDirty(Gfx.DIRTY_ALL)
+
+    # ------------------------------------
+    #  MOTION (evaluated by the shader : no CPU work and no upload per frame)
+    # ------------------------------------
+    # position(t) = P + V.dt + A.dt²/2 with dt = t - startTime,
+    # P being the X/Y position. The start time is the current system time by default
+    def setMotion(self, vx, vy, ax=0.0, ay=0.0, startTime=None):
+        if startTime == None:
+            startTime = Gfx._systemTime
+        offset = self._enableExtension(Gfx.EXT_MOTION)
+        self._data[offset + 0] = vx
+        self._data[offset + 1] = vy
+        self._data[offset + 2] = ax
+        self._data[offset + 3] = ay
+        self._data[offset + 4] = startTime
+        self._setDirty(Gfx.DIRTY_PAYLOAD)
+    def getMotion(self):
+        if not self.hasExtension(Gfx.EXT_MOTION):
+            return None
+        offset = self._getExtensionOffset(Gfx.EXT_MOTION)
+        return tuple(float(v) for v in self._data[offset:offset + 5])
+    # Position of the motion (the X/Y position if there is no motion)
+    def _getMotionPosition(self, systemTime):
+        x, y   = self._data[4], self._data[5]
+        motion = self.getMotion()
+        if motion != None:
+            vx, vy, ax, ay, t0 = motion
+            dt = systemTime - t0
+            x += vx * dt + 0.5 * ax * dt * dt
+            y += vy * dt + 0.5 * ay * dt * dt
+        return (x, y)
+    # Position evaluated like in the shader (motion, then path)
+    def getCurrentPosition(self, systemTime=None):
+        if systemTime == None:
+            systemTime = Gfx._systemTime
+        x, y   = self._getMotionPosition(systemTime)
+        dx, dy = self.getPathOffset(systemTime)
+        return (x + dx, y + dy)
+    # The sprite stays at its current position
+    def stopMotion(self):
+        if not self.hasExtension(Gfx.EXT_MOTION):
+            return
+        x, y = self._getMotionPosition(Gfx._systemTime)
+        self._disableExtension(Gfx.EXT_MOTION)
+        self.setPosition(x, y)
+
+    # ------------------------------------
+    #  PATH (evaluated by the shader : no CPU work and no upload per frame)
+    # ------------------------------------
+    # The X/Y position is the center of the path : the scripts only modify it
+    # when the path has to move (the sprite keeps following the path).
+    # The speed is in degrees per second (360 = one lap per second), the phase
+    # in degrees, and the start time is the current system time by default
+    def setCirclePath(self, radius, speed, phase=0.0, startTime=None):
+        self._setPath(Gfx.PATH_CIRCLE, radius, radius, 0.0, 0.0, speed, phase, startTime)
+    def setEllipsePath(self, radiusX, radiusY, speed, phase=0.0, startTime=None):
+        self._setPath(Gfx.PATH_ELLIPSE, radiusX, radiusY, 0.0, 0.0, speed, phase, startTime)
+    # The sprite goes along the rectangle edges, clockwise from the top left corner
+    # (each edge takes a quarter of the lap)
+    def setRectanglePath(self, radiusX, radiusY, speed, phase=0.0, startTime=None):
+        self._setPath(Gfx.PATH_RECTANGLE, radiusX, radiusY, 0.0, 0.0, speed, phase, startTime)
+    # x = radiusX.cos(a.angle), y = radiusY.sin(b.angle)
+    def setLissajousPath(self, radiusX, radiusY, a, b, speed, phase=0.0, startTime=None):
+        self._setPath(Gfx.PATH_LISSAJOUS, radiusX, radiusY, a, b, speed, phase, startTime)
+    # The sprite goes along the closed polyline (same time for each segment),
+    # the points of the GfxPath being scaled by scaleX/scaleY
+    def setPolylinePath(self, path, speed, scaleX=1.0, scaleY=1.0, phase=0.0, startTime=None):
+        x, y = path.getTexelCoords()
+        self._setPath(Gfx.PATH_POLYLINE, scaleX, scaleY, x, y, speed, phase, startTime)
+        path._addUser(self)
+        self._path = path
+
+    def _setPath(self, pathType, radiusX, radiusY, param0, param1, speed, phase, startTime):
+        if startTime == None:
+            startTime = Gfx._systemTime
+        if self._path != None:
+            self._path._removeUser(self)
+            self._path = None
+        offset = self._enableExtension(Gfx.EXT_PATH)
+        self._data[offset + 0] = pathType
+        self._data[offset + 1] = speed
+        self._data[offset + 2] = phase
+        self._data[offset + 3] = startTime
+        self._data[offset + 4] = radiusX
+        self._data[offset + 5] = radiusY
+        self._data[offset + 6] = param0
+        self._data[offset + 7] = param1
+        self._setDirty(Gfx.DIRTY_PAYLOAD)
+
+    # (path type, speed, phase, start time, radius X, radius Y, param 0, param 1)
+    def getPath(self):
+        if not self.hasExtension(Gfx.EXT_PATH):
+            return None
+        offset = self._getExtensionOffset(Gfx.EXT_PATH)
+        values = [float(v) for v in self._data[offset:offset + 8]]
+        values[0] = int(values[0])
+        return tuple(values)
+    # The points of the polyline have been moved in the FS GPU (GfxPath relocation)
+    def _setPathCoords(self, x, y):
+        offset = self._getExtensionOffset(Gfx.EXT_PATH)
+        self._data[offset + 6] = x
+        self._data[offset + 7] = y
+        self._setDirty(Gfx.DIRTY_PAYLOAD)
+
+    # Offset from the center of the path, evaluated like in the shader ((0, 0) if there is no path)
+    def getPathOffset(self, systemTime=None):
+        path = self.getPath()
+        if path == None:
+            return (0.0, 0.0)
+        if systemTime == None:
+            systemTime = Gfx._systemTime
+        pathType, speed, phase, t0, rx, ry, p0, p1 = path
+        angle = speed * (systemTime - t0) + phase
+        if pathType == Gfx.PATH_RECTANGLE:
+            ratio = angle / 360
+            ratio = (ratio - math.floor(ratio)) * 4
+            edge  = int(ratio) % 4
+            f     = 2 * (ratio - int(ratio)) - 1
+            if edge == 0:
+                return ( f * rx, -ry)
+            if edge == 1:
+                return ( rx,  f * ry)
+            if edge == 2:
+                return (-f * rx,  ry)
+            return (-rx, -f * ry)
+        if pathType == Gfx.PATH_POLYLINE:
+            x, y = self._path.getPosition(angle / 360)
+            return (x * rx, y * ry)
+        a, b  = (p0, p1) if pathType == Gfx.PATH_LISSAJOUS else (1.0, 1.0)
+        angle = math.radians(angle)
+        return (math.cos(a * angle) * rx, math.sin(b * angle) * ry)
+
+    # The sprite stays at its current position (the center is moved)
+    def stopPath(self):
+        if not self.hasExtension(Gfx.EXT_PATH):
+            return
+        dx, dy = self.getPathOffset()
+        if self._path != None:
+            self._path._removeUser(self)
+            self._path = None
+        self._disableExtension(Gfx.EXT_PATH)
+        self.movePosition(dx, dy)
+
+    # ------------------------------------
+    #  TWEENS (evaluated by the shader : no CPU work and no upload per frame)
+    # ------------------------------------
+    # Same easing functions as in the shader (t in [0, 1])
+    @staticmethod
+    def ease(easing, t):
+        t = min(max(t, 0.0), 1.0)
+        if easing == Gfx.EASE_IN_QUAD:
+            return t * t
+        if easing == Gfx.EASE_OUT_QUAD:
+            return t * (2 - t)
+        if easing == Gfx.EASE_IN_OUT_QUAD:
+            return 2 * t * t if t < 0.5 else -1 + (4 - 2 * t) * t
+        if easing == Gfx.EASE_IN_CUBIC:
+            return t * t * t
+        if easing == Gfx.EASE_OUT_CUBIC:
+            return (t - 1) ** 3 + 1
+        if easing == Gfx.EASE_IN_OUT_CUBIC:
+            return 4 * t * t * t if t < 0.5 else (t - 1) * (2 * t - 2) * (2 * t - 2) + 1
+        if easing == Gfx.EASE_IN_OUT_SINE:
+            return 0.5 - 0.5 * math.cos(math.pi * t)
+        if easing == Gfx.EASE_OUT_BACK:
+            return 1 + 2.70158 * (t - 1) ** 3 + 1.70158 * (t - 1) ** 2
+        return t
+
+    # The property (scale, angle, alpha or RGB color) goes from its current value
+    # (or from the start value if given) to the end value, during the duration (in seconds).
+    # The start time is the current system time by default.
+    # The header keeps the start value until the tween is stopped
+    def setTween(self, ext, end, duration, easing=EASE_LINEAR, startTime=None, start=None):
+        if ext not in Gfx.TWEEN_VALUES:
+            raise RuntimeError(f"[ERROR] the extension {ext} is not a tween !")
+        if startTime == None:
+            startTime = Gfx._systemTime
+        first, N, mask = Gfx.TWEEN_VALUES[ext]
+        end = tuple(end) if N > 1 else (end,)
+        if len(end) < N:
+            raise RuntimeError(f"[ERROR] bad end value for the tween {ext} : {end} !")
+        if start != None:
+            start = tuple(start) if N > 1 else (start,)
+            for i in range(N):
+                self._data[first + i] = start[i]
+            self._setDirty(mask)
+        offset = self._enableExtension(ext)
+        for i in range(N):
+            self._data[offset + i] = end[i]
+        self._data[offset + N + 0] = easing
+        self._data[offset + N + 1] = startTime
+        self._data[offset + N + 2] = duration
+        self._setDirty(Gfx.DIRTY_PAYLOAD)
+
+    # (end value, easing, start time, duration), the end value being a tuple for the color
+    def getTween(self, ext):
+        if not self.hasExtension(ext):
+            return None
+        first, N, mask = Gfx.TWEEN_VALUES[ext]
+        offset = self._getExtensionOffset(ext)
+        end    = tuple(float(v) for v in self._data[offset:offset + N])
+        easing, startTime, duration = (float(v) for v in self._data[offset + N:offset + N + 3])
+        return (end if N > 1 else end[0], int(easing), startTime, duration)
+
+    # Value evaluated like in the shader (the header value if there is no tween)
+    def getTweenValue(self, ext, systemTime=None):
+        first, N, mask = Gfx.TWEEN_VALUES[ext]
+        start = tuple(float(v) for v in self._data[first:first + N])
+        tween = self.getTween(ext)
+        if tween != None:
+            if systemTime == None:
+                systemTime = Gfx._systemTime
+            end, easing, startTime, duration = tween
+            end = end if N > 1 else (end,)
+            t   = (systemTime - startTime) / duration if duration > 0 else 1.0
+            k   = Gfx.ease(easing, t)
+            start = tuple(start[i] + (end[i] - start[i]) * k for i in range(N))
+        return start if N > 1 else start[0]
+
+    # The header gets the current value (or the end value if complete is True)
+    def stopTween(self, ext, complete=False):
+        tween = self.getTween(ext)
+        if tween == None:
+            return
+        first, N, mask = Gfx.TWEEN_VALUES[ext]
+        value = tween[0] if complete else self.getTweenValue(ext)
+        value = value if N > 1 else (value,)
+        self._disableExtension(ext)
+        for i in range(N):
+            self._data[first + i] = value[i]
+        self._setDirty(mask)
 
 
+    # ------------------------------------
+    #  BATCH (copy several buffers into the GPU texture at once)
+    # ------------------------------------
+    @staticmethod
+    def writeMany(gfxList):
+        if len(gfxList) == 0:
+            return
+        Gfx._fsgpu.writeMany([g._blockID for g in gfxList], [g._data for g in gfxList])
+        for g in gfxList:
+            g._store.clearDirty(g._slot)
+
+    # ------------------------------------
+    #  BATCH TRANSFORMS (write into the Gfx stores without any Gfx method call)
+    # ------------------------------------
+    # The Gfx list can be given as a GfxBatch (slots already grouped per store)
+    # The values are a (N, 2) numpy array (or a list of N pairs), in the Gfx list order
+    @staticmethod
+    def setPositions(gfxList, xy):
+        for store, slots, indexes in GfxBatch.getGroups(gfxList):
+            store.setValues(slots, 4, GfxBatch.take(xy, indexes), Gfx.DIRTY_POSITION)
+
+    @staticmethod
+    def moveBy(gfxList, dxy):
+        for store, slots, indexes in GfxBatch.getGroups(gfxList):
+            store.addValues(slots, 4, GfxBatch.take(dxy, indexes), Gfx.DIRTY_POSITION)
+
+    # Copy the modified values of all the Gfx into the FS GPU
+    # (one gather per Gfx store). It returns the number of written Gfx
+    @staticmethod
+    def flushAll():
+        return GfxStore.flushAll(Gfx._fsgpu)
+
     # ------------------------------------
     #  UPDATE (copy buffer into the GPU texture
     # ------------------------------------
+    # Write this Gfx right now if it has not been flushed yet
+    # (the Gfx system flushes all the stores at once each frame)
     def update(self, deltaTime):
-        # update data into FS if needed
-        if self._writeToFS:
+        # update data into FS if needed (not flushed yet)
+        dirty = self._store.getDirtyRange(self._slot)
+        if dirty != None:
             #print(f"Writing {self._data} into FS")
-            Gfx._fsgpu.write2Texture(self._blockID, self._data)
-            self._writeToFS = False
+            start, end = dirty
+            Gfx._fsgpu.write2Texture(self._blockID, self._data[start:end], start)
+            self._store.clearDirty(self._slot)
+
+    # Called once per placement period (by the Gfx system) : migrate the static Gfx
+    # modified too often, and the dynamic Gfx not modified at all during the period.
+    # The Gfx animated by the shader are never migrated (they are not static, even
+    # if their block is not written)
+    def checkPlacement(self):
+        nbWrites = self._store.getNbWrites(self._slot)
+        if self.getExtensions() != 0:
+            # Animated by the shader : the write frequency is meaningless
+            pass
+        elif self._placement == Gfx.PLACEMENT_STATIC:
+            if nbWrites > Gfx.PLACEMENT_PERIOD * Gfx.STATIC_MAX_WRITE_RATIO:
+                self.setPlacement(Gfx.PLACEMENT_DYNAMIC)
+        elif self._placement == Gfx.PLACEMENT_DYNAMIC:
+            if nbWrites == 0:
+                self.setPlacement(Gfx.PLACEMENT_STATIC)
+        self._store.resetNbWrites(self._slot)
+
+
+
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+class GfxBatch():
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+    # ------------------------------------
+    #  SLOTS
+    # ------------------------------------
+    __slots__ = ['_groups',
+                 '_size',
+                ]
+
+    # ------------------------------------
+    #  CONSTRUCTOR
+    # ------------------------------------
+    # Slots of a list of Gfx, grouped per store : (store, slots, indexes in the list).
+    # A script moving the same Gfx each frame creates it once and gives it
+    # to the batch transforms. It must be created again if the data size
+    # of one of the Gfx has changed (the Gfx has moved to another store)
+    def __init__(self, gfxList):
+        groups = {}
+        for i in range(len(gfxList)):
+            gfx = gfxList[i]
+            if gfx._store not in groups:
+                groups[gfx._store] = ([], [])
+            groups[gfx._store][0].append(gfx._slot)
+            groups[gfx._store][1].append(i)
+        self._groups = []
+        for store in groups:
+            slots, indexes = groups[store]
+            if numpy != None:
+                slots   = numpy.array(slots  , dtype=numpy.int64)
+                indexes = numpy.array(indexes, dtype=numpy.int64)
+            self._groups.append((store, slots, indexes))
+        self._size = len(gfxList)
+
+    def __len__(self):
+        return self._size
+
+    @staticmethod
+    def getGroups(gfxList):
+        if not isinstance(gfxList, GfxBatch):
+            gfxList = GfxBatch(gfxList)
+        return gfxList._groups
+
+    # Values of the Gfx of one group
+    @staticmethod
+    def take(values, indexes):
+        if numpy != None:
+            return numpy.asarray(values, dtype=numpy.float32)[indexes]
+        return [values[i] for i in indexes]
+
+
+
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+class GfxPath():
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+# @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
+
+    # ------------------------------------
+    #  PATHS
+    # ------------------------------------
+    # All the paths (blockID => GfxPath)
+    _pathByBlockID = {}
+
+    # Called by the FS GPU when blocks have been moved (old blockID => new blockID) :
+    # the Gfx following a moved path get the new coordinates of its points
+    @staticmethod
+    def _relocateBlocks(relocations):
+        moved = []
+        for old in relocations:
+            path = GfxPath._pathByBlockID.pop(old, None)
+            if path != None:
+                moved.append(path)
+                path._blockID = relocations[old]
+        for path in moved:
+            GfxPath._pathByBlockID[path._blockID] = path
+            x, y = path.getTexelCoords()
+            for gfx in path._users:
+                gfx._setPathCoords(x, y)
+
+    # ------------------------------------
+    #  SLOTS
+    # ------------------------------------
+    __slots__ = ['_blockID',
+                 '_points',
+                 '_users',
+                ]
+
+    # ------------------------------------
+    #  CONSTRUCTOR
+    # ------------------------------------
+    # Closed polyline shared by several Gfx (setPolylinePath). The points (x, y)
+    # are relative to the center of the path, and stored once for all in a static
+    # block of the FS GPU : texel 0 = number of points, then 2 points per texel
+    def __init__(self, points):
+        if len(points) < 2:
+            raise RuntimeError(f"[ERROR] a path needs at least 2 points ! nbPoints={len(points)}")
+        self._points  = [(float(x), float(y)) for x, y in points]
+        self._users   = set()
+        data          = [float(len(points)), 0.0, 0.0, 0.0]
+        for x, y in self._points:
+            data += [x, y]
+        self._blockID = Gfx._fsgpu.alloc(len(data), Gfx.TYPE_PATH, placement=Gfx.PLACEMENT_STATIC)
+        Gfx._fsgpu.write2Texture(self._blockID, array.array("f", data))
+        GfxPath._pathByBlockID[self._blockID] = self
+
+    # ------------------------------------
+    #  PROPERTIES
+    # ------------------------------------
+    def getBlockID(self):
+        return self._blockID
+    def getPoints(self):
+        return self._points
+    def getNbPoints(self):
+        return len(self._points)
+    # Coordinates of the first texel of the points in the FS texture
+    # (exact float values, unlike the block ID)
+    def getTexelCoords(self):
+        return Gfx._fsgpu.getTexelCoords(self._blockID)
+
+    def _addUser(self, gfx):
+        self._users.add(gfx)
+    def _removeUser(self, gfx):
+        self._users.discard(gfx)
+
+    # Position along the polyline (ratio = number of laps), like in the shader
+    def getPosition(self, ratio):
+        N     = len(self._points)
+        ratio = (ratio - math.floor(ratio)) * N
+        i     = min(int(ratio), N - 1)
+        f     = ratio - i
+        x0, y0 = self._points[i]
+        x1, y1 = self._points[(i + 1) % N]
+        return (x0 + (x1 - x0) * f, y0 + (y1 - y0) * f)
+
+    # The block is released : the path must not be used anymore
+    def release(self):
+        if len(self._users) > 0:
+            raise RuntimeError(f"[ERROR] the path {self._blockID} cannot be released as it is still used by {len(self._users)} Gfx !")
+        GfxPath._pathByBlockID.pop(self._blockID, None)
+        Gfx._fsgpu.free(self._blockID)
 
 
 
@@ -313,9 +1013,20 @@ class GfxSprite(Gfx):
     __slots__ = ["_blockID",
                  ]
 
+    # ------------------------------------
+    #  CONSTANTS
+    # ------------------------------------
+    NB_VALUES = Gfx.HEADER_SIZE + 4
+    # Animation loop modes
+    ANIM_ONCE     = 0
+    ANIM_LOOP     = 1
+    ANIM_PINGPONG = 2
+
     # ------------------------------------
     #  CONSTRUCTOR
     # ------------------------------------
+    # If the blockID is given, the block is already allocated (batch creation)
+    # and the data is not written into the FS : this is done by the caller
     def __init__(self,
                  textureName,
                  width=-1, height=-1,
@@ -332,8 +1043,10 @@ class GfxSprite(Gfx):
                  filterColor=(255,255,255),
                  anchorX=0.0,
                  anchorY=0.0,
-                 name="GfxSprite"):
-        NB_VALUES = Gfx.HEADER_SIZE + 4
+                 name="GfxSprite",
+                 placement=Gfx.PLACEMENT_DYNAMIC,
+                 blockID=None):
+        NB_VALUES = GfxSprite.NB_VALUES
         # Get texture info from loader
         texture   = Gfx._loader.getTextureByName(textureName)
         textureID = texture["id"]
@@ -346,7 +1059,10 @@ class GfxSprite(Gfx):
         if height > 0:
             h = height
         # Allocate buffer in the file system for it
-        self._blockID = Gfx._fsgpu.alloc(NB_VALUES, Gfx.TYPE_SPRITE)
+        batch = blockID != None
+        if not batch:
+            blockID = Gfx._fsgpu.alloc(NB_VALUES, Gfx.TYPE_SPRITE, placement=placement)
+        self._blockID = blockID
         # Call parent constructor
         super().__init__(w, h,
                          x=x,
@@ -365,12 +1081,27 @@ class GfxSprite(Gfx):
                          dataSize=NB_VALUES,
                          gfxType=Gfx.TYPE_SPRITE,
                          blockID=self._blockID,
-                         name=name+'_'+textureName)
+                         name=name+'_'+textureName,
+                         placement=placement)
 
         # Store specific information for this Sprite
         self.setTextureID(textureID)
         # Update the first time it is created
-        self.update(1/60)
+        if not batch:
+            self.update(1/60)
+
+    # ------------------------------------
+    #  BATCH CONSTRUCTOR
+    # ------------------------------------
+    # Create one sprite per texture name (all with the same other parameters).
+    # All the blocks are allocated contiguously and written with a single upload
+    @staticmethod
+    def createMany(textureNames, **kwargs):
+        ids = Gfx._fsgpu.allocMany(len(textureNames), GfxSprite.NB_VALUES, Gfx.TYPE_SPRITE,
+                                        placement=kwargs.get("placement", Gfx.PLACEMENT_DYNAMIC))
+        gfxList = [GfxSprite(textureNames[i], blockID=ids[i], **kwargs) for i in range(len(ids))]
+        Gfx.writeMany(gfxList)
+        return gfxList
 
     # ------------------------------------
     #  TEXTURE ID
@@ -379,7 +1110,85 @@ class GfxSprite(Gfx):
         return self._data[Gfx.HEADER_SIZE + 0]
     def setTextureID(self, v):
         self._data[Gfx.HEADER_SIZE + 0]  = v
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_PAYLOAD)
+
+    # ------------------------------------
+    #  ANIMATION (evaluated by the shader : no CPU work and no upload per frame)
+    # ------------------------------------
+    # The frames of a sprite sheet are consecutive textures in the atlas
+    # ("<name>_0", "<name>_1", ...) : the shader displays the texture
+    # firstID + frame, the frame being computed from the system time
+    def setAnimation(self, firstTextureName, nbFrames, fps, loopMode=ANIM_LOOP, startTime=None):
+        if nbFrames <= 0 or fps <= 0:
+            raise RuntimeError(f"[ERROR] bad animation parameters : nbFrames={nbFrames} fps={fps} !")
+        if startTime == None:
+            startTime = Gfx._systemTime
+        firstID = GfxSprite._getFrameTextureIDs(firstTextureName, nbFrames)
+        offset  = self._enableExtension(Gfx.EXT_ANIMATION)
+        self._data[offset + 0] = firstID
+        self._data[offset + 1] = nbFrames
+        self._data[offset + 2] = fps
+        self._data[offset + 3] = loopMode
+        self._data[offset + 4] = startTime
+        self._setDirty(Gfx.DIRTY_PAYLOAD)
+    def getAnimation(self):
+        if not self.hasExtension(Gfx.EXT_ANIMATION):
+            return None
+        offset = self._getExtensionOffset(Gfx.EXT_ANIMATION)
+        firstID, nbFrames, fps, loopMode, t0 = (float(v) for v in self._data[offset:offset + 5])
+        return (int(firstID), int(nbFrames), fps, int(loopMode), t0)
+    # Frame evaluated like in the shader (0 if there is no animation)
+    def getCurrentFrame(self, systemTime=None):
+        anim = self.getAnimation()
+        if anim == None:
+            return 0
+        if systemTime == None:
+            systemTime = Gfx._systemTime
+        firstID, nbFrames, fps, loopMode, t0 = anim
+        return GfxSprite.getFrame(max(systemTime - t0, 0.0), nbFrames, fps, loopMode)
+    # A "ONCE" animation stays on its last frame when it is over
+    def isAnimationOver(self, systemTime=None):
+        anim = self.getAnimation()
+        if anim == None:
+            return True
+        if systemTime == None:
+            systemTime = Gfx._systemTime
+        firstID, nbFrames, fps, loopMode, t0 = anim
+        return loopMode == GfxSprite.ANIM_ONCE and (systemTime - t0) * fps >= nbFrames
+    # The sprite keeps its current frame
+    def stopAnimation(self):
+        anim = self.getAnimation()
+        if anim == None:
+            return
+        frame = self.getCurrentFrame()
+        self._disableExtension(Gfx.EXT_ANIMATION)
+        self.setTextureID(anim[0] + frame)
+
+    # Same computation as in the shader
+    @staticmethod
+    def getFrame(dt, nbFrames, fps, loopMode):
+        frame = int(dt * fps)
+        if loopMode == GfxSprite.ANIM_ONCE:
+            return min(frame, nbFrames - 1)
+        if loopMode == GfxSprite.ANIM_PINGPONG and nbFrames > 1:
+            period = 2 * nbFrames - 2
+            frame  = frame % period
+            return frame if frame < nbFrames else period - frame
+        return frame % nbFrames
+
+    # Texture ID of the first frame : the IDs of the next frames must follow
+    @staticmethod
+    def _getFrameTextureIDs(firstTextureName, nbFrames):
+        firstID = Gfx._loader.getTextureByName(firstTextureName)["id"]
+        name, sep, index = firstTextureName.rpartition("_")
+        if nbFrames > 1:
+            if sep == "" or not index.isdigit():
+                raise RuntimeError(f"[ERROR] the texture '{firstTextureName}' is not a frame of a sprite sheet !")
+            for i in range(1, nbFrames):
+                texture = Gfx._loader.getTextureByName(f"{name}_{int(index) + i}")
+                if texture["id"] != firstID + i:
+                    raise RuntimeError(f"[ERROR] the frames of the animation '{firstTextureName}' are not consecutive in the atlas !")
+        return firstID
 
 
 
@@ -395,9 +1204,16 @@ class GfxBox(Gfx):
     __slots__ = ['_blockID',
                  ]
 
+    # ------------------------------------
+    #  CONSTANTS
+    # ------------------------------------
+    NB_VALUES = Gfx.HEADER_SIZE + 4
+
     # ------------------------------------
     #  CONSTRUCTOR
     # ------------------------------------
+    # If the blockID is given, the block is already allocated (batch creation)
+    # and the data is not written into the FS : this is done by the caller
     def __init__(self,
                  inClr=(0,0,0,0),
                  width=-1,
@@ -415,10 +1231,12 @@ class GfxBox(Gfx):
                  filterColor=(255, 255, 255),
                  anchorX=0.0,
                  anchorY=0.0,
-                 name="GfxBox"):
+                 name="GfxBox",
+                 placement=Gfx.PLACEMENT_DYNAMIC,
+                 blockID=None):
 
         # We need to add
-        NB_VALUES = Gfx.HEADER_SIZE + 4
+        NB_VALUES = GfxBox.NB_VALUES
         # if width or height is not filled, use default dimensions
         w = 16
         h = 16
@@ -427,7 +1245,10 @@ class GfxBox(Gfx):
         if height > 0:
             h = height
         # Allocate buffer in the file system for it
-        self._blockID = Gfx._fsgpu.alloc(NB_VALUES, Gfx.TYPE_RECTANGLE)
+        batch = blockID != None
+        if not batch:
+            blockID = Gfx._fsgpu.alloc(NB_VALUES, Gfx.TYPE_RECTANGLE, placement=placement)
+        self._blockID = blockID
         # Call parent constructor
         super().__init__(w, h,
                          x=x,
@@ -446,12 +1267,27 @@ class GfxBox(Gfx):
                          dataSize=NB_VALUES,
                          gfxType=Gfx.TYPE_RECTANGLE,
                          blockID=self._blockID,
-                         name=name)
+                         name=name,
+                         placement=placement)
 
         # Store specific information for this Sprite (colors)
         self.setInColor(inClr)
         # Update the first time it is created
-        self.update(1 / 60)
+        if not batch:
+            self.update(1 / 60)
+
+    # ------------------------------------
+    #  BATCH CONSTRUCTOR
+    # ------------------------------------
+    # Create one box per inner color (all with the same other parameters).
+    # All the blocks are allocated contiguously and written with a single upload
+    @staticmethod
+    def createMany(inClrs, **kwargs):
+        ids = Gfx._fsgpu.allocMany(len(inClrs), GfxBox.NB_VALUES, Gfx.TYPE_RECTANGLE,
+                                        placement=kwargs.get("placement", Gfx.PLACEMENT_DYNAMIC))
+        gfxList = [GfxBox(inClrs[i], blockID=ids[i], **kwargs) for i in range(len(ids))]
+        Gfx.writeMany(gfxList)
+        return gfxList
 
     # ------------------------------------
     #  INNER COLOR
@@ -469,7 +1305,7 @@ class GfxBox(Gfx):
         self._data[Gfx.HEADER_SIZE + 1]   = v[1]
         self._data[Gfx.HEADER_SIZE + 2]   = v[2]
         self._data[Gfx.HEADER_SIZE + 3]   = alpha
-        self._writeToFS = True
+        self._setDirty(Gfx.DIRTY_PAYLOAD)
 
 
 
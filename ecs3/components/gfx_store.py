@@ -0,0 +1,293 @@
+import array
+import re
+
+# NumPy is optional : without it, the dirty slots are gathered in a Python loop
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class GfxStore():
+
+    # ------------------------------------
+    #  STORES (one per number of values)
+    # ------------------------------------
+    _stores = {}
+
+    # ------------------------------------
+    #  DIRTY MASKS
+    # ------------------------------------
+    # The modified values of a slot are given as a mask of texels (4 values) :
+    # bit N is the texel N of the row, the last bit is all the texels from the 8th one
+    NB_MASK_BITS = 8
+    MASK_ALL     = 0xFF
+    _NOT_ZERO    = re.compile(b"[^\x00]")
+
+    # Range of texels [first, last] covering the mask
+    @staticmethod
+    def getTexelRange(mask):
+        first = 0
+        while not mask & (1 << first):
+            first += 1
+        last = GfxStore.NB_MASK_BITS - 1
+        while not mask & (1 << last):
+            last -= 1
+        return first, last
+
+    @staticmethod
+    def getStore(nbValues):
+        nbValues = int(nbValues)
+        if nbValues not in GfxStore._stores:
+            GfxStore._stores[nbValues] = GfxStore(nbValues)
+        return GfxStore._stores[nbValues]
+
+    # Copy the modified values of all the Gfx into the GPU file system
+    # It returns the number of written blocks
+    @staticmethod
+    def flushAll(fsgpu):
+        N = 0
+        for store in GfxStore._stores.values():
+            N += store.flush(fsgpu)
+        return N
+
+
+    # ------------------------------------
+    #  SLOTS
+    # ------------------------------------
+    __slots__ = ['_nbValues',
+                 '_capacity',
+                 '_nbSlots',
+                 '_freeSlots',
+                 '_data',
+                 '_blockIDs',
+                 '_dirty',
+                 '_nbWrites',
+                 '_gfx',
+                ]
+
+    # ------------------------------------
+    #  CONSTRUCTOR
+    # ------------------------------------
+    # All the Gfx with the same number of values share one contiguous float32
+    # storage (one row per slot). Each Gfx only keeps a view on its row, so the
+    # setters write directly into the store, and set the modified texels in the
+    # dirty mask of the slot : the flush gathers the modified slots (grouped by
+    # range of modified texels) and gives them to the GPU file system, that only
+    # copies these texels into the texture
+    def __init__(self, nbValues, capacity=256):
+        self._nbValues  = nbValues
+        self._capacity  = 0
+        self._nbSlots   = 0
+        self._freeSlots = []
+        self._gfx       = []
+        self._data      = None
+        self._blockIDs  = None
+        self._dirty     = None
+        self._nbWrites  = None
+        self._resize(capacity)
+
+
+    # ------------------------------------
+    #  PROPERTIES
+    # ------------------------------------
+    def getNbValues(self):
+        return self._nbValues
+    def getNbSlots(self):
+        return self._nbSlots - len(self._freeSlots)
+    def getCapacity(self):
+        return self._capacity
+    def getData(self):
+        # > numpy.ndarray (capacity x nbValues) or array.array (flat)
+        return self._data
+    def getRow(self, slot):
+        if numpy != None:
+            return self._data[slot]
+        N = self._nbValues
+        return memoryview(self._data)[slot * N:(slot + 1) * N]
+    def getBlockID(self, slot):
+        return int(self._blockIDs[slot])
+    def setBlockID(self, slot, blockID):
+        self._blockIDs[slot] = blockID
+
+
+    # ------------------------------------
+    #  PRIVATE METHODS
+    # ------------------------------------
+    # Reallocate the storage (the Gfx views are updated)
+    def _resize(self, capacity):
+        N = self._nbSlots
+        if numpy != None:
+            data     = numpy.zeros((capacity, self._nbValues), dtype=numpy.float32)
+            blockIDs = numpy.zeros(capacity, dtype=numpy.uint32)
+            dirty    = numpy.zeros(capacity, dtype=numpy.uint8)
+            nbWrites = numpy.zeros(capacity, dtype=numpy.int32)
+            if N > 0:
+                data    [:N] = self._data    [:N]
+                blockIDs[:N] = self._blockIDs[:N]
+                dirty   [:N] = self._dirty   [:N]
+                nbWrites[:N] = self._nbWrites[:N]
+        else:
+            data     = array.array("f", bytes(4 * capacity * self._nbValues))
+            blockIDs = array.array("I", bytes(4 * capacity))
+            dirty    = bytearray(capacity)
+            nbWrites = array.array("l", [0, ] * capacity)
+            if N > 0:
+                data    [:N * self._nbValues] = self._data[:N * self._nbValues]
+                blockIDs[:N] = self._blockIDs[:N]
+                dirty   [:N] = self._dirty   [:N]
+                nbWrites[:N] = self._nbWrites[:N]
+        self._data     = data
+        self._blockIDs = blockIDs
+        self._dirty    = dirty
+        self._nbWrites = nbWrites
+        self._capacity = capacity
+        # Views of the existing Gfx
+        for slot in range(N):
+            gfx = self._gfx[slot]
+            if gfx != None:
+                gfx._data = self.getRow(slot)
+
+    # Get the modified slots and their masks (and clear them)
+    def _popDirtySlots(self):
+        N = self._nbSlots
+        if numpy != None:
+            slots = numpy.flatnonzero(self._dirty[:N])
+            masks = self._dirty[slots]
+            self._dirty[slots] = 0
+            return slots, masks
+        dirty = self._dirty
+        slots = [m.start() for m in GfxStore._NOT_ZERO.finditer(dirty, 0, N)]
+        masks = [dirty[slot] for slot in slots]
+        for slot in slots:
+            dirty[slot] = 0
+        return slots, masks
+
+    # Range of values [start, end[ of the texel range [first, last] (in the row)
+    def _getValueRange(self, first, last):
+        start = first * 4
+        end   = self._nbValues if last == GfxStore.NB_MASK_BITS - 1 else min((last + 1) * 4, self._nbValues)
+        return start, end
+
+
+    # ------------------------------------
+    #  PUBLIC API
+    # ------------------------------------
+    # Give a slot to the Gfx : its _data attribute becomes the view on the slot row
+    # (values set to 0) and it is marked as modified
+    def add(self, gfx, blockID):
+        if len(self._freeSlots) > 0:
+            slot = self._freeSlots.pop()
+            self._gfx[slot] = gfx
+        else:
+            if self._nbSlots >= self._capacity:
+                self._resize(self._capacity * 2)
+            slot = self._nbSlots
+            self._nbSlots += 1
+            self._gfx.append(gfx)
+        row = self.getRow(slot)
+        row[:] = array.array("f", bytes(4 * self._nbValues)) if numpy == None else 0.0
+        gfx._data = row
+        self._blockIDs[slot] = blockID
+        self._dirty   [slot] = GfxStore.MASK_ALL
+        self._nbWrites[slot] = 0
+        return slot
+
+    def remove(self, slot):
+        if self._gfx[slot] == None:
+            raise RuntimeError(f"[ERROR] cannot remove the slot {slot} of the Gfx store as it is ALREADY empty !")
+        self._gfx[slot]   = None
+        self._dirty[slot] = 0
+        self._freeSlots.append(slot)
+
+    def setDirty(self, slot, mask=MASK_ALL):
+        self._dirty[slot] |= mask
+    def isDirty(self, slot):
+        return self._dirty[slot] != 0
+    def getDirtyMask(self, slot):
+        return int(self._dirty[slot])
+    # Range of the modified values [start, end[ of the slot (None if not modified)
+    def getDirtyRange(self, slot):
+        mask = int(self._dirty[slot])
+        if mask == 0:
+            return None
+        return self._getValueRange(*GfxStore.getTexelRange(mask))
+    # The slot has been written into the GPU file system by its owner
+    def clearDirty(self, slot):
+        self._dirty[slot] = 0
+        self._nbWrites[slot] += 1
+
+    # Number of flushes of the slot since the last reset (used for the placement)
+    def getNbWrites(self, slot):
+        return int(self._nbWrites[slot])
+    def resetNbWrites(self, slot):
+        self._nbWrites[slot] = 0
+
+    # Set (or add to) the values [start, start+K[ of several slots (values is
+    # a (N, K) numpy array, or a list of N sequences of K values without numpy)
+    # and mark the modified texels of these slots
+    def setValues(self, slots, start, values, mask):
+        if numpy != None:
+            values = numpy.asarray(values, dtype=numpy.float32)
+            self._data[slots, start:start + values.shape[1]] = values
+            self._dirty[slots] |= mask
+        else:
+            for i in range(len(slots)):
+                row = self.getRow(slots[i])
+                for k in range(len(values[i])):
+                    row[start + k] = values[i][k]
+                self._dirty[slots[i]] |= mask
+
+    def addValues(self, slots, start, values, mask):
+        if numpy != None:
+            values = numpy.asarray(values, dtype=numpy.float32)
+            self._data[slots, start:start + values.shape[1]] += values
+            self._dirty[slots] |= mask
+        else:
+            for i in range(len(slots)):
+                row = self.getRow(slots[i])
+                for k in range(len(values[i])):
+                    row[start + k] += values[i][k]
+                self._dirty[slots[i]] |= mask
+
+    # Copy all the modified slots into the GPU file system. The slots are grouped
+    # by range of modified texels (e.g. all the moved sprites only need their
+    # position texel) : one gather of the modified values per group (numpy),
+    # then the file system merges the close parts of each page in a few writes.
+    # It returns the number of written blocks
+    def flush(self, fsgpu):
+        slots, masks = self._popDirtySlots()
+        if len(slots) == 0:
+            return 0
+        if numpy != None:
+            self._nbWrites[slots] += 1
+            keys = GfxStore._FIRST[masks] * GfxStore.NB_MASK_BITS + GfxStore._LAST[masks]
+            for key in numpy.unique(keys):
+                start, end = self._getValueRange(*divmod(int(key), GfxStore.NB_MASK_BITS))
+                if start >= end:
+                    continue
+                group = slots[keys == key]
+                fsgpu.writeMany(self._blockIDs[group].tolist(), self._data[group, start:end], start)
+        else:
+            groups = {}
+            for i in range(len(slots)):
+                self._nbWrites[slots[i]] += 1
+                key = GfxStore.getTexelRange(masks[i])
+                if key not in groups:
+                    groups[key] = []
+                groups[key].append(slots[i])
+            for key in groups:
+                start, end = self._getValueRange(*key)
+                if start >= end:
+                    continue
+                group = groups[key]
+                fsgpu.writeMany([self._blockIDs[slot] for slot in group], [self.getRow(slot)[start:end] for slot in group], start)
+        return len(slots)
+
+
+# Lookup tables of the texel ranges of all the masks (vectorised flush)
+if numpy != None:
+    GfxStore._FIRST = numpy.zeros(1 << GfxStore.NB_MASK_BITS, dtype=numpy.int64)
+    GfxStore._LAST  = numpy.zeros(1 << GfxStore.NB_MASK_BITS, dtype=numpy.int64)
+    for mask in range(1, 1 << GfxStore.NB_MASK_BITS):
+        GfxStore._FIRST[mask], GfxStore._LAST[mask] = GfxStore.getTexelRange(mask)
@@ -0,0 +1,131 @@
+from .component import Component
+from .gfx       import Gfx
+
+
+class Tween(Component):
+
+    # ------------------------------------
+    #  PROPERTIES (Gfx tween extensions)
+    # ------------------------------------
+    SCALE = Gfx.EXT_TWEEN_SCALE
+    ANGLE = Gfx.EXT_TWEEN_ANGLE
+    ALPHA = Gfx.EXT_TWEEN_ALPHA
+    COLOR = Gfx.EXT_TWEEN_COLOR
+
+    # ------------------------------------
+    #  STATES
+    # ------------------------------------
+    STATE_IDLE      = 0
+    STATE_RUNNING   = 1
+    STATE_DONE      = 2
+    STATE_CANCELLED = 3
+
+    # Running tweens ((Gfx, property) => Tween) : a new tween of
+    # the same property of a Gfx cancels the previous one
+    _running = {}
+
+    # ------------------------------------
+    #  SLOTS
+    # ------------------------------------
+    __slots__ = ['_gfx',
+                 '_property',
+                 '_start',
+                 '_end',
+                 '_duration',
+                 '_easing',
+                 '_delay',
+                 '_callback',
+                 '_startTime',
+                 '_state',
+                ]
+
+    # ------------------------------------
+    #  CONSTRUCTOR
+    # ------------------------------------
+    # The property of the Gfx goes from its current value (or from the start value)
+    # to the end value : the values are written once into the Gfx block when the tween
+    # starts, then the shader interpolates them. The tween is started when it is
+    # registered in the scene (or by calling start). The callback (with the tween
+    # as parameter) is called by the tween system once the tween is over
+    def __init__(self, gfx, property, end, duration, easing=Gfx.EASE_LINEAR,
+                 delay=0.0, start=None, callback=None, name="Tween"):
+        super().__init__(Component.TYPE_TWEEN, name)
+        if property not in Gfx.TWEEN_VALUES:
+            raise RuntimeError(f"[ERROR] bad tween property {property} !")
+        self._gfx       = gfx
+        self._property  = property
+        self._start     = start
+        self._end       = end
+        self._duration  = duration
+        self._easing    = easing
+        self._delay     = delay
+        self._callback  = callback
+        self._startTime = None
+        self._state     = Tween.STATE_IDLE
+
+    # ------------------------------------
+    #  PROPERTIES
+    # ------------------------------------
+    def getGfx(self):
+        return self._gfx
+    def getProperty(self):
+        return self._property
+    def getStartTime(self):
+        return self._startTime
+    def getEndTime(self):
+        return None if self._startTime == None else self._startTime + self._duration
+    def getState(self):
+        return self._state
+    def isRunning(self):
+        return self._state == Tween.STATE_RUNNING
+    def isDone(self):
+        return self._state == Tween.STATE_DONE
+    def setCallback(self, callback):
+        self._callback = callback
+    # Current value (as displayed by the shader)
+    def getValue(self, systemTime=None):
+        return self._gfx.getTweenValue(self._property, systemTime)
+
+    # ------------------------------------
+    #  TIMELINE
+    # ------------------------------------
+    # Write the tween into the Gfx block. It returns the end time.
+    # The tween system is notified (through the scene) so a restarted
+    # tween (done, cancelled or still running) is scheduled again
+    def start(self, systemTime=None):
+        if systemTime == None:
+            systemTime = Gfx.getSystemTime()
+        key  = (self._gfx, self._property)
+        prev = Tween._running.get(key)
+        if prev != None and prev is not self:
+            prev.cancel()
+        self._startTime = systemTime + self._delay
+        self._gfx.setTween(self._property, self._end, self._duration, self._easing, self._startTime, self._start)
+        self._state = Tween.STATE_RUNNING
+        Tween._running[key] = self
+        scn = self.getScene()
+        if scn != None:
+            scn.notifyTweenStart(self)
+        return self.getEndTime()
+
+    # The Gfx keeps the end value, and the callback is called
+    def complete(self):
+        if self._state != Tween.STATE_RUNNING:
+            return
+        self._gfx.stopTween(self._property, complete=True)
+        self._finish(Tween.STATE_DONE)
+        if self._callback != None:
+            self._callback(self)
+
+    # The Gfx keeps its current value (the callback is not called)
+    def cancel(self):
+        if self._state != Tween.STATE_RUNNING:
+            return
+        self._gfx.stopTween(self._property)
+        self._finish(Tween.STATE_CANCELLED)
+
+    def _finish(self, state):
+        self._state = state
+        key = (self._gfx, self._property)
+        if Tween._running.get(key) is self:
+            del Tween._running[key]
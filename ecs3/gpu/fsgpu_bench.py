@@ -0,0 +1,357 @@
+import argparse
+import json
+import random
+import sys
+import time
+from array import array
+
+from .fsgpu_main import FsGpuMain
+
+
+# ----------------------------------------------------
+# FAKE GL OBJECTS
+# ----------------------------------------------------
+# Stand-in for a moderngl texture : the writes are only counted
+class FakeTexture():
+
+    def __init__(self, size, components, dtype="f4"):
+        self.size       = size
+        self.components = components
+        self.dtype      = dtype
+        self.nbWrites   = 0
+        self.nbBytes    = 0
+
+    def write(self, data, viewport=None, level=0, alignment=1):
+        self.nbWrites += 1
+        if isinstance(data, FakeBuffer):
+            self.nbBytes += data.nbBytes
+        else:
+            self.nbBytes += memoryview(data).nbytes
+
+    def use(self, location=0):
+        pass
+
+    def release(self):
+        pass
+
+    def resetCounters(self):
+        self.nbWrites = 0
+        self.nbBytes  = 0
+
+
+# Stand-in for a moderngl buffer (pixel buffer object)
+class FakeBuffer():
+
+    def __init__(self, reserve=0):
+        self.size      = reserve
+        self.nbBytes   = 0
+        self.nbOrphans = 0
+
+    def write(self, data, offset=0):
+        nbBytes = memoryview(data).nbytes
+        if offset + nbBytes > self.size:
+            raise RuntimeError(f"[ERROR] fake buffer overflow : size={self.size} offset={offset} nbBytes={nbBytes} !")
+        self.nbBytes = nbBytes
+
+    def orphan(self, size=-1):
+        self.nbOrphans += 1
+
+    def release(self):
+        pass
+
+
+# Stand-in for a fence (sync object) : the GPU is always done
+class FakeFence():
+
+    def __init__(self):
+        self.nbWaits = 0
+
+    def wait(self, timeout=None):
+        self.nbWaits += 1
+        return True
+
+
+# Stand-in for a moderngl framebuffer
+class FakeFramebuffer():
+
+    def __init__(self, color_attachments=()):
+        self.color_attachments = list(color_attachments)
+
+    def release(self):
+        pass
+
+
+# Stand-in for a moderngl context (only what the file system needs)
+class FakeContext():
+
+    def __init__(self):
+        self.info = {"GL_MAX_TEXTURE_SIZE": 16 * 1024}
+        self.nbCopies  = 0
+        self.nbBuffers = 0
+        self.nbFences  = 0
+
+    def texture(self, size, components, data=None, dtype="f1"):
+        return FakeTexture(size, components, dtype)
+
+    def framebuffer(self, color_attachments=(), depth_attachment=None):
+        return FakeFramebuffer(color_attachments)
+
+    def copy_framebuffer(self, dst, src):
+        self.nbCopies += 1
+
+    def buffer(self, data=None, reserve=0, dynamic=False):
+        self.nbBuffers += 1
+        return FakeBuffer(reserve)
+
+    def fence(self):
+        self.nbFences += 1
+        return FakeFence()
+
+
+# ----------------------------------------------------
+# BENCHMARK
+# ----------------------------------------------------
+# Drive a FsGpuMain instance (with a fake texture) through several churn
+# scenarios, frame after frame, and measure the latency of each operation
+# (alloc, free, realloc, defrag) with perf_counter_ns.
+# The results are returned as a dict that can be dumped in JSON, in order
+# to compare the allocator strategies from one commit to another
+class FsGpuBench():
+
+    # Gfx block sizes (sprite/box user size)
+    GFX_SIZE = 24
+    # (user size, weight) for the mixed scenario
+    MIXED_SIZES = [(24, 70), (64, 12), (256, 10), (1024, 6), (4096, 2)]
+
+    # ----------------------------------------------------
+    # CONSTRUCTOR
+    # ----------------------------------------------------
+    def __init__(self, pageSize=16*1024, nbPages=16, frames=600, seed=0,
+                 useLocal=False, useNumpy=False, useStaging=False,
+                 useSlabs=True, defragBudget=0.0, useUploadRing=False):
+        self._pageSize     = pageSize
+        self._nbPages      = nbPages
+        self._frames       = frames
+        self._seed         = seed
+        self._useLocal     = useLocal or useStaging or useUploadRing or defragBudget > 0
+        self._useNumpy     = useNumpy
+        self._useStaging   = useStaging or useUploadRing
+        self._useRing      = useUploadRing
+        self._useSlabs     = useSlabs
+        self._defragBudget = defragBudget
+        # values written into the blocks (one array per user size)
+        self._values = {}
+
+
+    # ----------------------------------------------------
+    # SCENARIOS
+    # ----------------------------------------------------
+    # Each scenario gives, for a frame, the number of blocks to allocate,
+    # to free and to reallocate, depending on the number of living blocks.
+    # - steady  : constant population with a small turnover
+    # - burst   : waves of spawned blocks, slowly released
+    # - despawn : a huge population, mostly released at once from time to time
+    # - mixed   : steady turnover with several block sizes and reallocations
+    def _steady(self, frame, nbAlive):
+        nbAlloc = self._rng.randint(20, 40)
+        nbFree  = nbAlloc if nbAlive > 2000 else 0
+        return nbAlloc, nbFree, 0
+
+    def _burst(self, frame, nbAlive):
+        nbAlloc = 2000 if frame % 30 == 0 else 0
+        return nbAlloc, nbAlive // 50, 0
+
+    def _despawn(self, frame, nbAlive):
+        if frame % 60 == 59:
+            return 0, (nbAlive * 9) // 10, 0
+        return 300, 0, 0
+
+    def _mixed(self, frame, nbAlive):
+        nbAlloc = self._rng.randint(20, 40)
+        nbFree  = nbAlloc if nbAlive > 1000 else 0
+        return nbAlloc, nbFree, nbAlive // 20
+
+    def _gfxSize(self):
+        return FsGpuBench.GFX_SIZE
+
+    def _mixedSize(self):
+        sizes   = [s for s, w in FsGpuBench.MIXED_SIZES]
+        weights = [w for s, w in FsGpuBench.MIXED_SIZES]
+        return self._rng.choices(sizes, weights)[0]
+
+    def getScenarios(self):
+        return {"steady" : (self._steady , self._gfxSize  ),
+                "burst"  : (self._burst  , self._gfxSize  ),
+                "despawn": (self._despawn, self._gfxSize  ),
+                "mixed"  : (self._mixed  , self._mixedSize),
+                }
+
+
+    # ----------------------------------------------------
+    # PRIVATE METHODS
+    # ----------------------------------------------------
+    def _getValues(self, userSize):
+        if userSize not in self._values:
+            self._values[userSize] = array("f", [float(i) for i in range(userSize)])
+        return self._values[userSize]
+
+    # Set the FsGpuMain flags for this benchmark, and return the previous values
+    def _setFlags(self):
+        flags = {"USE_LOCAL_FS_BUFFER": self._useLocal,
+                 "USE_NUMPY"          : self._useNumpy,
+                 "USE_STAGING"        : self._useStaging,
+                 "USE_UPLOAD_RING"    : self._useRing,
+                 "DEFRAG_TIME_BUDGET" : 0.0,
+                 }
+        saved = {}
+        for name in flags:
+            saved[name] = getattr(FsGpuMain, name)
+            setattr(FsGpuMain, name, flags[name])
+        return saved
+
+    def _createFS(self):
+        fs = FsGpuMain(FakeContext(), self._pageSize, self._nbPages)
+        if self._useSlabs:
+            fs.addSlabSize(FsGpuBench.GFX_SIZE)
+        return fs
+
+    @staticmethod
+    def getLatencies(times):
+        out = {"count": len(times)}
+        if len(times) == 0:
+            return out
+        times = sorted(times)
+        N = len(times)
+        out["p50_ns" ] = times[(N - 1) * 50 // 100]
+        out["p99_ns" ] = times[(N - 1) * 99 // 100]
+        out["max_ns" ] = times[-1]
+        out["mean_ns"] = sum(times) // N
+        return out
+
+
+    # ----------------------------------------------------
+    # PUBLIC API
+    # ----------------------------------------------------
+    def runScenario(self, name):
+        getCounts, getSize = self.getScenarios()[name]
+        self._rng = random.Random(self._seed)
+        saved = self._setFlags()
+        timer   = time.perf_counter_ns
+        times   = {"alloc": [], "free": [], "realloc": [], "defrag": []}
+        frag    = []
+        alive   = []
+        nbMoved = 0
+        try:
+            fs  = self._createFS()
+            tex = fs.getTexture()
+            for frame in range(self._frames):
+                nbAlloc, nbFree, nbRealloc = getCounts(frame, len(alive))
+                # Free
+                for i in range(min(nbFree, len(alive))):
+                    index = self._rng.randrange(len(alive))
+                    alive[index], alive[-1] = alive[-1], alive[index]
+                    id = alive.pop()
+                    t0 = timer()
+                    fs.free(id)
+                    times["free"].append(timer() - t0)
+                # Alloc (and write the user data)
+                for i in range(nbAlloc):
+                    values = self._getValues(getSize())
+                    t0 = timer()
+                    id = fs.alloc(len(values), 1, data=values)
+                    times["alloc"].append(timer() - t0)
+                    alive.append(id)
+                # Realloc
+                for i in range(min(nbRealloc, len(alive))):
+                    index = self._rng.randrange(len(alive))
+                    t0 = timer()
+                    id = fs.realloc(alive[index], getSize())
+                    times["realloc"].append(timer() - t0)
+                    alive[index] = id
+                # Compaction
+                if self._defragBudget > 0:
+                    t0 = timer()
+                    relocations = fs.defrag(self._defragBudget)
+                    times["defrag"].append(timer() - t0)
+                    nbMoved += len(relocations)
+                    if len(relocations) > 0:
+                        alive = [relocations.get(id, id) for id in alive]
+                # End of frame
+                fs.render()
+                frag.append(fs.getFragmentation())
+        finally:
+            for name in saved:
+                setattr(FsGpuMain, name, saved[name])
+        result = {name: FsGpuBench.getLatencies(times[name]) for name in times}
+        result["fragmentation"] = {"final": frag[-1] if len(frag) > 0 else 0.0,
+                                   "max"  : max(frag, default=0.0),
+                                   "mean" : sum(frag) / len(frag) if len(frag) > 0 else 0.0,
+                                   }
+        result["alive"]  = len(alive)
+        result["moved"]  = nbMoved
+        result["upload"] = {"writes": tex.nbWrites, "bytes": tex.nbBytes}
+        result["stats"]  = fs.getStats()
+        return result
+
+    def run(self, names=None):
+        if names == None:
+            names = list(self.getScenarios())
+        out = {"config": {"pageSize"     : self._pageSize,
+                          "nbPages"      : self._nbPages,
+                          "frames"       : self._frames,
+                          "seed"         : self._seed,
+                          "useLocal"     : self._useLocal,
+                          "useNumpy"     : self._useNumpy,
+                          "useStaging"   : self._useStaging,
+                          "useUploadRing": self._useRing,
+                          "useSlabs"     : self._useSlabs,
+                          "defragBudget" : self._defragBudget,
+                          },
+               "scenarios": {},
+               }
+        for name in names:
+            out["scenarios"][name] = self.runScenario(name)
+        return out
+
+
+# ----------------------------------------------------
+# COMMAND LINE
+# ----------------------------------------------------
+# python -m ecs3.gpu.fsgpu_bench --frames 600 --slabs --out result.json
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GPU file system allocator benchmark")
+    parser.add_argument("--page-size"    , type=int  , default=16*1024)
+    parser.add_argument("--pages"        , type=int  , default=16)
+    parser.add_argument("--frames"       , type=int  , default=600)
+    parser.add_argument("--seed"         , type=int  , default=0)
+    parser.add_argument("--local"        , action="store_true", help="use the local FS buffer")
+    parser.add_argument("--numpy"        , action="store_true", help="use the numpy page storage")
+    parser.add_argument("--staging"      , action="store_true", help="use the staging mode")
+    parser.add_argument("--upload-ring"  , action="store_true", help="use the upload ring (staging mode)")
+    parser.add_argument("--no-slabs"     , action="store_true", help="do not use slab pages for the Gfx blocks")
+    parser.add_argument("--defrag-budget", type=float, default=0.0, help="compaction time budget per frame (seconds)")
+    parser.add_argument("--scenario"     , action="append", help="scenario to run (default : all)")
+    parser.add_argument("--out"          , default=None, help="JSON output file (default : stdout)")
+    args = parser.parse_args(argv)
+
+    bench = FsGpuBench(pageSize=args.page_size,
+                       nbPages=args.pages,
+                       frames=args.frames,
+                       seed=args.seed,
+                       useLocal=args.local,
+                       useNumpy=args.numpy,
+                       useStaging=args.staging,
+                       useUploadRing=args.upload_ring,
+                       useSlabs=not args.no_slabs,
+                       defragBudget=args.defrag_budget)
+    result = bench.run(args.scenario)
+    if args.out == None:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,13 @@
 import array
 import sys
+import time
+from bisect import bisect_left, insort
+
+# NumPy is optional : it is only needed for the NumPy page storage
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class FsGpuBuffer():
@@ -11,6 +19,16 @@ class FsGpuBuffer():
                  '_nbComp',
                  '_modified',
                  '_freeBlocks',
+                 '_freeBins',
+                 '_freeSizes',
+                 '_freeEnds',
+                 '_dirtySpans',
+                 '_freeSize',
+                 '_nbUsed',
+                 '_minChange',
+                 '_nbChanges',
+                 '_scrubFree',
+                 '_scrubVersion',
                 ]
 
     # ----------------------------------------------------
@@ -39,11 +57,60 @@ class FsGpuBuffer():
     def _computeCHK(self, offset):
         v = 0
         if FsGpuBuffer.CHECK_INTEGRITY:
-            v += self._buffer[offset + FsGpuBuffer.LENG]
-            v += self._buffer[offset + FsGpuBuffer.TYPE]
-            v += self._buffer[offset + FsGpuBuffer.SIZE]
+            v = self._sumCHK(offset)
+        return v
+
+    # Checksum of a block header (not stored if the integrity is not checked)
+    def _sumCHK(self, offset):
+        v  = self._buffer[offset + FsGpuBuffer.LENG]
+        v += self._buffer[offset + FsGpuBuffer.TYPE]
+        v += self._buffer[offset + FsGpuBuffer.SIZE]
         return v
 
+    # Register a structural change (block headers) starting at this offset
+    # The lowest changed offset is always a valid block header
+    def _noteChange(self, offset):
+        self._nbChanges += 1
+        if offset < self._minChange:
+            self._minChange = offset
+
+    # Check one block header : returns an error message or None
+    def _checkBlock(self, offset):
+        L = int(self._buffer[offset + FsGpuBuffer.LENG])
+        T = int(self._buffer[offset + FsGpuBuffer.TYPE])
+        S = int(self._buffer[offset + FsGpuBuffer.SIZE])
+        C = int(self._buffer[offset + FsGpuBuffer.CHCK])
+        header = f"@0x{offset:04X} LENG={L} TYPE={T} SIZE={S} CHCK={C}"
+        if L < FsGpuBuffer.OVERHEAD or offset + L > self._size:
+            return f"{header} : bad block length (overlap or out of the page)"
+        # A header written without the integrity check has no checksum (CHCK=0)
+        if C != self._sumCHK(offset) and (C != 0 or FsGpuBuffer.CHECK_INTEGRITY):
+            return f"{header} : bad checksum"
+        if T == FsGpuBuffer.FREE:
+            return self._checkFreeBlock(offset, L, header)
+        if S > L - FsGpuBuffer.OVERHEAD:
+            return f"{header} : user size bigger than the block"
+        return None
+
+    # Check the free block is correctly stored in the free block tables
+    def _checkFreeBlock(self, offset, L, header):
+        if self._freeBlocks.get(offset) != L:
+            return f"{header} : free block not in the free list (or bad length {self._freeBlocks.get(offset)})"
+        if self._freeEnds.get(offset + L) != offset:
+            return f"{header} : bad boundary tag for this free block"
+        if offset not in self._freeBins.get(L, ()):
+            return f"{header} : free block not in its size class"
+        offset2 = offset + L
+        if offset2 < self._size and self._isFree(offset2):
+            return f"{header} : free block not merged with the next one @0x{offset2:04X}"
+        return None
+
+    # Check the number of free blocks found in a whole page pass
+    def _checkFreeCount(self, nbFree):
+        if nbFree != len(self._freeBlocks):
+            return f"{nbFree} free blocks found but {len(self._freeBlocks)} in the free list"
+        return None
+
     def _verifCHK(self, offset):
         if FsGpuBuffer.CHECK_INTEGRITY:
             # Check offset
@@ -61,6 +128,35 @@ class FsGpuBuffer():
     # ----------------------------------------------------
     # FREE BLOCKS
     # ----------------------------------------------------
+    # The free blocks are also indexed by size class (exact block length) :
+    # - each bin contains the offsets of all the free blocks with this length
+    # - the sorted list of lengths allows a best-fit search in O(log n)
+    # Sprite/Box blocks all have the same length, so most of the allocations
+    # directly hit an existing bin in O(1)
+    def _addToBin(self, offset, L):
+        bin = self._freeBins.get(L)
+        if bin == None:
+            bin = set()
+            self._freeBins[L] = bin
+            insort(self._freeSizes, L)
+        bin.add(offset)
+
+    def _removeFromBin(self, offset, L):
+        bin = self._freeBins[L]
+        bin.remove(offset)
+        if len(bin) == 0:
+            del self._freeBins[L]
+            del self._freeSizes[bisect_left(self._freeSizes, L)]
+
+    # Get any block of a size class (it stays in the bin until it is allocated) :
+    # set.pop() resumes its scan where the previous one stopped, whereas iterating
+    # the set restarts from its first slot and skips all the emptied ones
+    def _pickFromBin(self, L):
+        bin = self._freeBins[L]
+        offset = bin.pop()
+        bin.add(offset)
+        return offset
+
     # This must be done when AFTER the block has been freed
     def _addFreeBlock(self, offset):
         # Check offset
@@ -70,12 +166,15 @@ class FsGpuBuffer():
         if not T == FsGpuBuffer.FREE:
             raise RuntimeError(f"[ERROR] impossible to add a free block as it is not free ! offset={offset}")
         # Get user Length
-        L = self._buffer[offset + FsGpuBuffer.LENG]
+        L = int(self._buffer[offset + FsGpuBuffer.LENG])
         # check entry
         if offset in self._freeBlocks:
             raise RuntimeError(f"[ERROR] impossible to add a free block as it is already added ! offset={offset}")
         # add entry
         self._freeBlocks[offset] = L
+        self._freeEnds[offset + L] = offset
+        self._addToBin(offset, L)
+        self._freeSize += L
 
     # This must be done BEFORE filling it or AFTER erasing it
     def _removeFreeBlock(self, offset):
@@ -90,7 +189,10 @@ class FsGpuBuffer():
         if offset not in self._freeBlocks:
             raise RuntimeError(f"[ERROR] impossible to remove a free block as it is not added ! offset={offset}")
         # remove entry
-        del self._freeBlocks[offset]
+        L = self._freeBlocks.pop(offset)
+        del self._freeEnds[offset + L]
+        self._removeFromBin(offset, L)
+        self._freeSize -= L
 
     # update is done AFTER the block has been updated
     def _updateFreeBlock(self, offset, newLength):
@@ -104,46 +206,115 @@ class FsGpuBuffer():
         if offset not in self._freeBlocks:
             raise RuntimeError(f"[ERROR] impossible to update a free block as it is not added ! offset={offset}")
         # updateentry
+        newLength = int(newLength)
+        L = self._freeBlocks[offset]
+        del self._freeEnds[offset + L]
+        self._removeFromBin(offset, L)
         self._freeBlocks[offset] = newLength
+        self._freeEnds[offset + newLength] = offset
+        self._addToBin(offset, newLength)
+        self._freeSize += newLength - L
 
 
     # ----------------------------------------------------
     # CONSTRUCTOR
     # ----------------------------------------------------
-    def __init__(self, W, H=1, nbComp=4):
+    # The storage can be provided by the caller (e.g. a row of a numpy float32 array
+    # shared by all the pages) : else an array.array is created.
+    # Without format, the buffer is left as it is and the free blocks are not
+    # registered : the caller must call restore (e.g. when loading a snapshot)
+    def __init__(self, W, H=1, nbComp=4, buffer=None, format=True):
         # init buffer
         self._size   = W * H * nbComp
         self._nbComp = nbComp
 
-        # > array array
-        self._buffer = array.array("f", [0.0,] * int(self._size))
+        if buffer is None:
+            # > array array (created from zero bytes, to avoid building a huge list)
+            self._buffer = array.array("f", bytes(4 * int(self._size)))
+        else:
+            # > any float32 storage (array.array, numpy.ndarray, ...)
+            if len(buffer) != self._size:
+                raise RuntimeError(f"[ERROR] bad buffer length : len={len(buffer)} expected={self._size} !")
+            self._buffer = buffer
 
         # Set first block as empty
-        self._buffer[FsGpuBuffer.TYPE] = FsGpuBuffer.FREE
-        self._buffer[FsGpuBuffer.LENG] = self._size
-        self._buffer[FsGpuBuffer.SIZE] = self._size
-        self._buffer[FsGpuBuffer.CHCK] = self._computeCHK(0)
+        if format:
+            self._buffer[FsGpuBuffer.TYPE] = FsGpuBuffer.FREE
+            self._buffer[FsGpuBuffer.LENG] = self._size
+            self._buffer[FsGpuBuffer.SIZE] = self._size
+            self._buffer[FsGpuBuffer.CHCK] = self._computeCHK(0)
 
         # Modified
         self._modified = True
+        # Parts of the buffer to be copied into the texture (staging mode)
+        # list of [start, end] offsets
+        self._dirtySpans = []
 
         # Keep a list of unused areas
         # dict with offset as key and user size as value
         self._freeBlocks = {}
-        self._addFreeBlock(0)
+        # Size class index of the unused areas
+        # dict with block length as key and set of offsets as value
+        self._freeBins   = {}
+        self._freeSizes  = []
+        # Boundary tags of the unused areas (side table)
+        # dict with block end offset as key and block offset as value
+        # it allows to find the free block just before a released one in O(1)
+        self._freeEnds   = {}
+        # Counters (free length and number of used blocks), maintained
+        # along with the free block list
+        self._freeSize   = 0
+        self._nbUsed     = 0
+        if format:
+            self._addFreeBlock(0)
+        # Scrubber information : lowest changed header and number of changes
+        # since the last scrub step, number of free blocks found in the current pass
+        self._minChange    = 0
+        self._nbChanges    = 0
+        self._scrubFree    = 0
+        self._scrubVersion = -1
 
 
     # ----------------------------------------------------
     # PROPERTIES
     # ----------------------------------------------------
     def getData(self):
-        # > array.array
+        # > array.array or numpy.ndarray (both support the buffer protocol)
         return self._buffer
 
+    # Replace the storage by another one with the same content (e.g. when
+    # the shared numpy array of the file system is reallocated)
+    def setData(self, buffer):
+        if len(buffer) != self._size:
+            raise RuntimeError(f"[ERROR] bad buffer length : len={len(buffer)} expected={self._size} !")
+        self._buffer = buffer
+
+    def isNumpy(self):
+        return numpy != None and isinstance(self._buffer, numpy.ndarray)
+
     def getBufferSize(self):
         return self._size
     def isModified(self):
         return self._modified
+    def getLargestFreeBlock(self):
+        if len(self._freeSizes) == 0:
+            return 0
+        return self._freeSizes[-1]
+    def getNbFreeBlocks(self):
+        return len(self._freeBlocks)
+    def getFreeSize(self):
+        return self._freeSize
+    def getUsedSize(self):
+        return self._size - self._freeSize
+    def getNbUsedBlocks(self):
+        return self._nbUsed
+
+    # Get the block length needed to store the requested user size
+    def getBlockSize(self, userSize):
+        # Get usersize multiple of nbcomps
+        userSize = ((userSize+self._nbComp-1)//self._nbComp)*self._nbComp
+        # Compute blocksize
+        return max(userSize, FsGpuBuffer.MIN_SIZE) + FsGpuBuffer.OVERHEAD
 
 
     # ----------------------------------------------------
@@ -170,8 +341,11 @@ class FsGpuBuffer():
         self._buffer[offset + FsGpuBuffer.CHCK] = self._computeCHK(offset)
         # Add this block into the free list
         self._addFreeBlock(offset)
-        # Try to merge with next buffer if empty too
+        self._nbUsed -= 1
+        # Try to merge with previous and next buffers if empty too
+        offset = self._mergePrev(offset)
         self._mergeNext(offset)
+        self._noteChange(offset)
         # Free process is ok
         self._modified = True
         return True
@@ -209,41 +383,41 @@ class FsGpuBuffer():
             # Add the new free block in the list
             self._addFreeBlock(offset2)
         # end of process
+        self._nbUsed  += 1
+        self._noteChange(offset)
         self._modified = True
         return offset
 
-    # Allocation process based on free block list : complexity depends on fragmentation
+    # Allocation process based on the size class index :
+    # O(1) when a free block has exactly the requested length, O(log n) otherwise
     def _allocateBlock2(self, userSize, userType):
         # Get usersize multiple of nbcomps
         userSize = ((userSize+self._nbComp-1)//self._nbComp)*self._nbComp
         # Compute blocksize
-        blockSize = userSize + FsGpuBuffer.OVERHEAD
-        # Browse each free block from the list
-        for offset in self._freeBlocks:
-            # Check data integrity
-            self._verifCHK(offset)
-            # Check it is really free
-            if not self._isFree(offset):
-                raise RuntimeError(f"[ERROR] there is an error in the free block list : the block @{offset} ith length={L} is not free !")
-
-            # Get length of this free block
-            L1 = self._freeBlocks[offset]
-            L2 = int(self._buffer[offset + FsGpuBuffer.LENG])
-            if L1 != L2:
-                raise RuntimeError(
-                    f"[ERROR] there is an error in the free block list : the block @{offset} : length is not good L1={L1} L2={L2}!")
-
-            # First check the block size fits
-            if blockSize < FsGpuBuffer.OVERHEAD + FsGpuBuffer.MIN_SIZE:
-                blockSize = FsGpuBuffer.OVERHEAD + FsGpuBuffer.MIN_SIZE
-            # If it finally fits, allocate
-            if blockSize <= L1:
-                return self._allocateSelected(userSize, userType, offset, L1)
-
-        # If we reach this part of code, no space was available
-        # either the memory is full or there are some free blocks
-        # too small for the requested usersize
-        return None
+        blockSize = self.getBlockSize(userSize)
+        # Look for the exact size class first, else the smallest bigger one (best fit)
+        L1 = blockSize
+        if L1 not in self._freeBins:
+            i = bisect_left(self._freeSizes, blockSize)
+            # If we reach this part of code, no space was available
+            # either the memory is full or there are some free blocks
+            # too small for the requested usersize
+            if i >= len(self._freeSizes):
+                return None
+            L1 = self._freeSizes[i]
+        # Take any block from this size class
+        offset = self._pickFromBin(L1)
+        # Check data integrity
+        self._verifCHK(offset)
+        # Check it is really free
+        if not self._isFree(offset):
+            raise RuntimeError(f"[ERROR] there is an error in the free block list : the block @{offset} with length={L1} is not free !")
+        L2 = int(self._buffer[offset + FsGpuBuffer.LENG])
+        if L1 != L2:
+            raise RuntimeError(
+                f"[ERROR] there is an error in the free block list : the block @{offset} : length is not good L1={L1} L2={L2}!")
+        # Allocate
+        return self._allocateSelected(userSize, userType, offset, L1)
 
     def _mergeNext(self, offset):
         while True:
@@ -251,6 +425,9 @@ class FsGpuBuffer():
             L = self._buffer[offset + FsGpuBuffer.LENG]
             # Get next block offset
             offset2 = int(offset + L)
+            # The last block of the buffer has no next block
+            if offset2 >= self._size:
+                return False
             # Check data integrity of next block
             self._verifCHK(offset2)
             # Check if this new block is empty so we can merge. else we just return
@@ -276,6 +453,35 @@ class FsGpuBuffer():
             else:
                 return False
 
+    # Merge the free block with the previous one if it is free too.
+    # The previous free block is found using the boundary tags.
+    # Returns the offset of the resulting free block
+    def _mergePrev(self, offset):
+        # Get previous free block (if any)
+        offset0 = self._freeEnds.get(offset)
+        if offset0 == None:
+            return offset
+        # Check data integrity of previous block
+        self._verifCHK(offset0)
+        # Get both block lengths
+        L0 = self._buffer[offset0 + FsGpuBuffer.LENG]
+        L  = self._buffer[offset  + FsGpuBuffer.LENG]
+        # Clear current
+        self._buffer[offset + FsGpuBuffer.TYPE] = 0
+        self._buffer[offset + FsGpuBuffer.LENG] = 0
+        self._buffer[offset + FsGpuBuffer.SIZE] = 0
+        self._buffer[offset + FsGpuBuffer.CHCK] = 0
+        # Remove current block from list
+        self._removeFreeBlock(offset)
+
+        # Update previous one (just length and integrity)
+        self._buffer[offset0 + FsGpuBuffer.LENG] = L0 + L
+        self._buffer[offset0 + FsGpuBuffer.SIZE] = L0 + L
+        self._buffer[offset0 + FsGpuBuffer.CHCK] = self._computeCHK(offset0)
+        # Update length of previous block
+        self._updateFreeBlock(offset0, L0 + L)
+        return offset0
+
     # read data (up to one full block)
     def _read(self, offset, length=-1, subOffset=0):
         # Check integrity for this block
@@ -306,7 +512,9 @@ class FsGpuBuffer():
         # prepare copy position into the buffer
         start = offset+FsGpuBuffer.OVERHEAD+subOffset
         end   = start+length
-        # copy sub array.array
+        # copy sub array.array (any other sequence is converted first)
+        if not isinstance(values, array.array) and isinstance(self._buffer, array.array):
+            values = array.array("f", values)
         self._buffer[start:end] = values
         # buffer has been modified
         self._modified = True
@@ -322,14 +530,170 @@ class FsGpuBuffer():
             raise RuntimeError(f"[ERROR] cannot allocate a block with a 'FREE' type. Type of block must be different from the value '{FsGpuBuffer.FREE}'")
         return self._allocateBlock2(userSize, userType)
 
+    # Allocate several blocks with the same size.
+    # The blocks are carved one after the other in the same free block (when possible)
+    # so they are contiguous in the buffer. It returns the list of offsets,
+    # that can contain less than 'count' elements if there is not enough space
+    def allocMany(self, count, userSize, userType):
+        if userType == FsGpuBuffer.FREE:
+            raise RuntimeError(f"[ERROR] cannot allocate a block with a 'FREE' type. Type of block must be different from the value '{FsGpuBuffer.FREE}'")
+        # Get usersize multiple of nbcomps
+        userSize  = ((userSize+self._nbComp-1)//self._nbComp)*self._nbComp
+        blockSize = self.getBlockSize(userSize)
+        offsets = []
+        while len(offsets) < count:
+            # Get a free block big enough for all the remaining blocks, else the biggest one
+            i = bisect_left(self._freeSizes, (count - len(offsets)) * blockSize)
+            if i >= len(self._freeSizes):
+                if len(self._freeSizes) == 0 or self._freeSizes[-1] < blockSize:
+                    break
+                i = len(self._freeSizes) - 1
+            L = self._freeSizes[i]
+            offset = self._pickFromBin(L)
+            # Carve consecutive blocks in this free block
+            while len(offsets) < count and L >= blockSize:
+                offsets.append(self._allocateSelected(userSize, userType, offset, L))
+                offset += int(self._buffer[offset + FsGpuBuffer.LENG])
+                L = self._freeBlocks.get(offset, 0)
+        return offsets
+
     # This method releases a previous reserved block
     def free(self, offset):
         return self._freeBlock(offset)
 
+    # Change the user size of a used block without moving it :
+    # - a smaller block releases its tail (if it is big enough to be a free block)
+    # - a bigger block is extended into the next block if it is free and big enough
+    # It returns False if the block cannot be resized in place
+    def resize(self, offset, userSize):
+        # Check data integrity
+        self._verifCHK(offset)
+        if self._isFree(offset):
+            raise RuntimeError(f"[ERROR] the block offset {offset} cannot be resized as it is empty !")
+        # Get usersize multiple of nbcomps
+        userSize  = ((userSize+self._nbComp-1)//self._nbComp)*self._nbComp
+        blockSize = self.getBlockSize(userSize)
+        L = int(self._buffer[offset + FsGpuBuffer.LENG])
+        if blockSize > L:
+            # Get next block (it must be free and big enough)
+            offset2 = offset + L
+            if offset2 >= self._size or not self._isFree(offset2):
+                return False
+            L2 = int(self._buffer[offset2 + FsGpuBuffer.LENG])
+            if L + L2 < blockSize:
+                return False
+            # Remove the next block and take its room
+            self._removeFreeBlock(offset2)
+            self._buffer[offset2 + FsGpuBuffer.TYPE] = 0
+            self._buffer[offset2 + FsGpuBuffer.LENG] = 0
+            self._buffer[offset2 + FsGpuBuffer.SIZE] = 0
+            self._buffer[offset2 + FsGpuBuffer.CHCK] = 0
+            L += L2
+        # Check if the remaining length is at least enough for another small block
+        if L - blockSize < FsGpuBuffer.OVERHEAD + FsGpuBuffer.MIN_SIZE:
+            # not enough room : keep all the room
+            blockSize = L
+        self._buffer[offset + FsGpuBuffer.LENG] = blockSize
+        self._buffer[offset + FsGpuBuffer.SIZE] = userSize
+        self._buffer[offset + FsGpuBuffer.CHCK] = self._computeCHK(offset)
+        if blockSize < L:
+            # Set the tail as a free block, and merge it with the next one if free too
+            offset2 = offset + blockSize
+            self._buffer[offset2 + FsGpuBuffer.TYPE] = FsGpuBuffer.FREE
+            self._buffer[offset2 + FsGpuBuffer.LENG] = L - blockSize
+            self._buffer[offset2 + FsGpuBuffer.SIZE] = L - blockSize
+            self._buffer[offset2 + FsGpuBuffer.CHCK] = self._computeCHK(offset2)
+            self._addFreeBlock(offset2)
+            self._mergeNext(offset2)
+        self._noteChange(offset)
+        self._modified = True
+        return True
+
+    # write the same amount of values in several blocks
+    # (values is a 2D numpy array or a list of value arrays, one per block)
+    # at the same position (subOffset) in each block.
+    # With a numpy storage, this is a vectorised scatter
+    def writeMany(self, offsets, values, subOffset=0):
+        if self.isNumpy():
+            offsets = numpy.asarray(offsets, dtype=numpy.int64)
+            values  = numpy.asarray(values , dtype=numpy.float32)
+            length  = values.shape[1]
+            if FsGpuBuffer.CHECK_INTEGRITY:
+                for offset in offsets:
+                    self._verifCHK(int(offset))
+            if (self._buffer[offsets + FsGpuBuffer.SIZE] < subOffset + length).any():
+                raise RuntimeError(f"[ERROR] writing too much to several blocks - writeLen={length} - subOffset={subOffset}")
+            self._buffer[offsets[:, None] + (FsGpuBuffer.OVERHEAD + subOffset + numpy.arange(length))] = values
+            self._modified = True
+        else:
+            for i in range(len(offsets)):
+                self._write(offsets[i], values[i], subOffset)
+
+    # Read the headers (LENG/TYPE/SIZE/CHCK) of several blocks
+    # With a numpy storage, this is a vectorised gather returning a (N, OVERHEAD) array
+    def readHeaders(self, offsets):
+        if self.isNumpy():
+            indexes = numpy.asarray(offsets, dtype=numpy.int64)[:, None] + numpy.arange(FsGpuBuffer.OVERHEAD)
+            return self._buffer[indexes]
+        return [self._buffer[offset:offset + FsGpuBuffer.OVERHEAD] for offset in offsets]
+
+    # Offsets of the free blocks (saved in the file system snapshots)
+    def getFreeOffsets(self):
+        return array.array("I", self._freeBlocks)
+
+    # Use a storage already formatted (e.g. loaded from a snapshot) : the block
+    # headers are in the data, the free block tables are rebuilt from the saved offsets
+    def restore(self, buffer, freeOffsets, nbUsed):
+        self.setData(buffer)
+        self._freeBlocks = {}
+        self._freeBins   = {}
+        self._freeSizes  = []
+        self._freeEnds   = {}
+        self._freeSize   = 0
+        for offset in freeOffsets:
+            self._addFreeBlock(int(offset))
+        self._nbUsed     = nbUsed
+        self._dirtySpans = []
+        self._modified   = True
+        self._noteChange(0)
+
     # Method used to reset the "modified" flag
     def resetModify(self):
         self._modified = False
 
+    # Register a modified part of the buffer [start, end[ that must be copied into the texture
+    # The span is extended to whole texels. It is merged with the last registered
+    # span if they are close enough (maxGap values), as the blocks are often written in order
+    def markDirty(self, start, end, maxGap=0):
+        nbComp = self._nbComp
+        start  = (start // nbComp) * nbComp
+        end    = ((end + nbComp - 1) // nbComp) * nbComp
+        spans  = self._dirtySpans
+        if len(spans) > 0:
+            last = spans[-1]
+            if start >= last[0] and start <= last[1] + maxGap:
+                if end > last[1]:
+                    last[1] = end
+                return
+        spans.append([start, end])
+        self._modified = True
+
+    # Get all the modified parts of the buffer (sorted and merged when the gap
+    # between them is less or equal to maxGap values), and reset them
+    def popDirtySpans(self, maxGap=0):
+        spans = self._dirtySpans
+        self._dirtySpans = []
+        self._modified   = False
+        spans.sort()
+        out = []
+        for span in spans:
+            if len(out) > 0 and span[0] <= out[-1][1] + maxGap:
+                if span[1] > out[-1][1]:
+                    out[-1][1] = span[1]
+            else:
+                out.append(span)
+        return out
+
     # read values
     def read(self, offset, length=-1, subOffset=0):
         return self._read(offset, length, subOffset)
@@ -338,29 +702,94 @@ class FsGpuBuffer():
     def write(self, offset, values, subOffset=0):
         self._write(offset, values, subOffset)
 
-    # Defrag operation
-    # For the moment we only merge free contiguous blocks,
-    # so this is not a real defrag process yet
-    def defrag(self):
-        # Each time we browse the free block list, if we merge free blocks,
-        # the list is modified while iterating on it : this generates an exception
-        # So to avoid problems, the process could stop the loop after one merge
-        # has been performed. That would mean we would only merge once per frame
-        # in the worst case : this would solve both the modification/iteration issue
-        # and would limit the CPU load : it seems to be a good compromise
-        for offset in self._freeBlocks:
+    # Check if the used blocks are not packed at the beginning of the buffer
+    # (more than one free block, or a single one that is not the last block)
+    def isFragmented(self):
+        N = len(self._freeBlocks)
+        return N > 1 or (N == 1 and self._size not in self._freeEnds)
+
+    # Defrag operation (compaction)
+    # The used blocks are slid down to the beginning of the buffer,
+    # one after the other, and the free space is moved towards the end.
+    # The process stops when the buffer is compacted or when the deadline
+    # (time.perf_counter() value) is reached : it will restart from the
+    # first free block at the next call.
+    # It returns the relocation map (dict with old offset as key and new offset as value)
+    # Only the local buffer is modified : the caller has to update the texture
+    # and all the references to the moved blocks
+    def defrag(self, deadline=None):
+        relocations = {}
+        if len(self._freeBlocks) == 0:
+            return relocations
+        # Start from the first free block
+        offset = min(self._freeBlocks)
+        self._noteChange(offset)
+        while True:
             # Check data integrity
             self._verifCHK(offset)
             # Get current slot information
             if not self._isFree(offset):
-                raise RuntimeError(f"[ERROR] the block offset {offset} cannot be merged as it is not empty : why is it in the free block list !?")
-            # merge was done, we exit from the defrag process
-            res = self._mergeNext(offset)
-            if res:
-                return True
-        # We reached the end of the free blocks and none was merged
-        return False
-
+                raise RuntimeError(f"[ERROR] the block offset {offset} cannot be compacted as it is not empty : why is it in the free block list !?")
+            # Get free block length and next block offset
+            L  = int(self._buffer[offset + FsGpuBuffer.LENG])
+            offset2 = offset + L
+            # The free block is the last one : the buffer is compacted
+            if offset2 >= self._size:
+                break
+            # Next block is used (free blocks are always merged together)
+            self._verifCHK(offset2)
+            L2 = int(self._buffer[offset2 + FsGpuBuffer.LENG])
+            # Remove the free block from the list
+            self._removeFreeBlock(offset)
+            # Move the used block (header + data) into the free space
+            self._buffer[offset:offset + L2] = self._buffer[offset2:offset2 + L2]
+            relocations[offset2] = offset
+            # Create the free block right after the moved one
+            offset = offset + L2
+            self._buffer[offset + FsGpuBuffer.TYPE] = FsGpuBuffer.FREE
+            self._buffer[offset + FsGpuBuffer.LENG] = L
+            self._buffer[offset + FsGpuBuffer.SIZE] = L
+            self._buffer[offset + FsGpuBuffer.CHCK] = self._computeCHK(offset)
+            self._addFreeBlock(offset)
+            # Try to merge with next buffer if empty too
+            self._mergeNext(offset)
+            self._modified = True
+            # Check the time budget
+            if deadline != None and time.perf_counter() >= deadline:
+                break
+        return relocations
+
+    # Scrubber : check up to nbBlocks block headers from the given offset
+    # (checksum, lengths, free tables, no overlap), until the deadline
+    # (time.perf_counter() value) is reached.
+    # If headers have changed before the offset since the last call,
+    # the check restarts from the lowest changed header.
+    # It returns the offset of the next block to check (the buffer size at the end
+    # of the buffer), the number of checked blocks and an error message (or None)
+    def scrub(self, offset, nbBlocks, deadline=None):
+        if self._minChange < offset:
+            offset = self._minChange
+            # the free blocks cannot be counted in this pass
+            self._scrubVersion = -1
+        if offset == 0:
+            self._scrubFree    = 0
+            self._scrubVersion = self._nbChanges
+        self._minChange = self._size
+        N = 0
+        while N < nbBlocks and offset < self._size:
+            error = self._checkBlock(offset)
+            if error != None:
+                return offset, N, error
+            if self._isFree(offset):
+                self._scrubFree += 1
+            offset += int(self._buffer[offset + FsGpuBuffer.LENG])
+            N += 1
+            if deadline != None and time.perf_counter() >= deadline:
+                break
+        # End of a whole pass without any change : check the number of free blocks
+        if offset >= self._size and self._scrubVersion == self._nbChanges:
+            return offset, N, self._checkFreeCount(self._scrubFree)
+        return offset, N, None
 
     # ----------------------------------------------------
     # DEBUG
@@ -381,7 +810,7 @@ class FsGpuBuffer():
             T = int(self._buffer[offset + FsGpuBuffer.TYPE])
             L = int(self._buffer[offset + FsGpuBuffer.LENG])
             U = int(self._buffer[offset + FsGpuBuffer.SIZE])
-            C =     self._buffer[offset + FsGpuBuffer.CHCK]
+            C = int(self._buffer[offset + FsGpuBuffer.CHCK])
             msg += f"<Block #{i} @{'0x{0:0{1}X}'.format(offset,8)} - blockLen={'0x{0:0{1}X}'.format(L,8)} - type={T} - userLen={'0x{0:0{1}X}'.format(U,8)} - checksum={C}>" + CR
             if displayData and T != FsGpuBuffer.FREE:
                 data = []
@@ -0,0 +1,88 @@
+import array
+
+
+class FsGpuIndex():
+
+    __slots__ = ['_nbLeaves',
+                 '_capacity',
+                 '_tree',
+                ]
+
+    # ----------------------------------------------------
+    # CONSTRUCTOR
+    # ----------------------------------------------------
+    # Segment tree (max) over the pages of the file system :
+    # each leaf stores the largest free block of one page,
+    # each node stores the max value of its children.
+    # The root then gives the largest free block of the whole file system
+    def __init__(self, nbLeaves):
+        self._nbLeaves = nbLeaves
+        # Capacity is the first power of 2 >= nb leaves
+        self._capacity = 1
+        while self._capacity < nbLeaves:
+            self._capacity *= 2
+        # Node #1 is the root, leaves are stored from node #capacity
+        # Unused leaves are set to -1 so they never match any search
+        self._tree = array.array("l", [0,] * (2 * self._capacity))
+        for i in range(self._capacity + nbLeaves, 2 * self._capacity):
+            self._tree[i] = -1
+        for i in range(self._capacity - 1, 0, -1):
+            self._tree[i] = max(self._tree[2*i], self._tree[2*i+1])
+
+
+    # ----------------------------------------------------
+    # PROPERTIES
+    # ----------------------------------------------------
+    def getNbLeaves(self):
+        return self._nbLeaves
+
+    def getMax(self):
+        return self._tree[1]
+
+    def get(self, leaf):
+        return self._tree[self._capacity + leaf]
+
+
+    # ----------------------------------------------------
+    # PUBLIC API
+    # ----------------------------------------------------
+    # Update a leaf value and all its parents : O(log n)
+    def set(self, leaf, value):
+        if leaf < 0 or leaf >= self._nbLeaves:
+            raise RuntimeError(f"[ERROR] bad leaf number for the page index : leaf={leaf} nbLeaves={self._nbLeaves} !")
+        tree = self._tree
+        i = self._capacity + leaf
+        tree[i] = value
+        i >>= 1
+        while i >= 1:
+            v = max(tree[2*i], tree[2*i+1])
+            if tree[i] == v:
+                break
+            tree[i] = v
+            i >>= 1
+
+    # Get the first leaf (lowest number) with a value >= minValue : O(log n)
+    # returns None if there is no such leaf
+    def findFirst(self, minValue):
+        tree = self._tree
+        if tree[1] < minValue:
+            return None
+        i = 1
+        while i < self._capacity:
+            i *= 2
+            if tree[i] < minValue:
+                i += 1
+        return i - self._capacity
+
+    # Get the last leaf (highest number) with a value >= minValue : O(log n)
+    # returns None if there is no such leaf
+    def findLast(self, minValue):
+        tree = self._tree
+        if tree[1] < minValue:
+            return None
+        i = 1
+        while i < self._capacity:
+            i = 2*i + 1
+            if tree[i] < minValue:
+                i -= 1
+        return i - self._capacity
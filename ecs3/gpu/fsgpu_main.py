@@ -1,13 +1,81 @@
+import array
 import math
+import struct
+import sys
 import time
-from random import choice, randint
 
 from .fsgpu_buffer import FsGpuBuffer
+from .fsgpu_index  import FsGpuIndex
+from .fsgpu_slab   import FsGpuSlab
+from .fsgpu_upload import FsGpuUploadRing
+
+# NumPy is optional : it is only needed for the NumPy page storage
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class FsGpuMain():
 
     USE_LOCAL_FS_BUFFER = False
+    # All the pages are stored in a single contiguous numpy float32 array (nbPages x pageSize)
+    # instead of one array.array per page : creation is instant, and a page or the whole
+    # file system can be copied into the texture without any conversion
+    USE_NUMPY           = False
+    # Staging mode : the writes only land in the local FS buffer, the modified parts
+    # of the pages are merged and copied into the texture once per frame (render).
+    # It needs the local FS buffer
+    USE_STAGING         = False
+    # Maximum gap (in texels) between 2 modified parts of a page to merge them
+    # in a single texture write (it is cheaper to copy a few unchanged texels)
+    STAGING_MERGE_GAP   = 64
+    # Upload ring (staging mode only) : the modified parts are copied into the texture
+    # through a ring of pixel buffer objects, one pool per frame in flight, so the CPU
+    # does not wait for the GPU still reading the texture of the previous frames
+    USE_UPLOAD_RING     = False
+    UPLOAD_RING_FRAMES  = 3
+    # Time budget (in seconds) for the compaction process in each update call
+    # The compaction needs the local FS buffer. Set 0 to disable it
+    DEFRAG_TIME_BUDGET  = 0.0
+    # Growable file system : when no page can store a block, the number of pages
+    # is multiplied by GROWTH_FACTOR (texture reallocated with more rows, the existing
+    # rows are copied GPU-side). The page numbers are stable so the block IDs remain valid.
+    # MAX_NB_PAGES = 0 means the limit is the max texture size (or the block ID format)
+    GROWABLE            = False
+    GROWTH_FACTOR       = 2.0
+    MAX_NB_PAGES        = 0
+    # Shrink : when the occupancy stays below SHRINK_OCCUPANCY during SHRINK_DELAY frames,
+    # the empty pages at the end of the file system are removed (never below the initial
+    # number of pages). Set 0 to disable it
+    SHRINK_OCCUPANCY    = 0.0
+    SHRINK_DELAY        = 600
+    # Integrity scrubber : a few block headers are checked in each update call
+    # (checksum if CHECK_INTEGRITY is set, lengths, free block tables), walking all the pages over the frames.
+    # SCRUB_BLOCKS is the max number of headers per update (0 disables it) and
+    # SCRUB_TIME_BUDGET the max time (in seconds). The first corruption found is
+    # raised (SCRUB_RAISE) or stored and reported once (getScrubError)
+    SCRUB_BLOCKS        = 0
+    SCRUB_TIME_BUDGET   = 0.0002
+    SCRUB_RAISE         = False
+
+    # Placement classes : the pages are reserved for one class when they receive
+    # their first block, and they are released when they are empty again.
+    # The static blocks are stored from the end of the memory, the other ones
+    # from the beginning : the modified blocks are gathered in a few pages
+    # (so a few texture rows to upload each frame)
+    PLACEMENT_DYNAMIC   = 0     # modified often (moving sprites, ...)
+    PLACEMENT_STATIC    = 1     # (almost) never modified (background, fonts, ...)
+    PLACEMENT_TRANSIENT = 2     # short life (particles, bullets, ...)
+    NB_PLACEMENTS       = 3
+
+    # Snapshot file : header (magic, page size, nb pages, nb components, nb free offsets),
+    # page table (slot size or 0, placement class, nb used blocks, nb free blocks per page),
+    # free block offsets, then the page data (float32) from SNAPSHOT_ALIGN bytes
+    SNAPSHOT_MAGIC      = b"FSGPU001"
+    SNAPSHOT_HEADER     = struct.Struct("<8s4I")
+    SNAPSHOT_PAGE       = struct.Struct("<Iiii")
+    SNAPSHOT_ALIGN      = 4096
 
     __slots__ = ['_pageShift',
                  '_maxPages',
@@ -18,6 +86,25 @@ class FsGpuMain():
                  '_ctx',
                  '_texture',
                  '_pages',
+                 '_storage',
+                 '_pageIndex',
+                 '_pageClass',
+                 '_classIndexes',
+                 '_slabSizes',
+                 '_slabPages',
+                 '_defragPage',
+                 '_dirtyPages',
+                 '_relocationCallbacks',
+                 '_frameCounters',
+                 '_lastFrameCounters',
+                 '_totalCounters',
+                 '_initNbPages',
+                 '_lowOccupancyFrames',
+                 '_usedSize',
+                 '_uploadRing',
+                 '_scrubPage',
+                 '_scrubOffset',
+                 '_scrubError',
                 ]
 
     # ----------------------------------------------------
@@ -39,10 +126,22 @@ class FsGpuMain():
         # Each page is a FsGpuBuffer instance
         self._pageSize = pageSize
         self._nbPages  = nbPages
+        self._initNbPages = nbPages
+        self._lowOccupancyFrames = 0
         self._nbComp   = 4
         # Store gl context
         self._ctx = ctx
+        # Block sizes handled by slab pages
+        self._slabSizes = set()
+        # Callbacks notified when blocks are moved : they receive the relocation map
+        # (dict with old blockID as key and new blockID as value)
+        self._relocationCallbacks = []
+        # Operation counters (current frame, last finished frame, and since the beginning)
+        self._frameCounters     = FsGpuMain._newCounters()
+        self._lastFrameCounters = FsGpuMain._newCounters()
+        self._totalCounters     = FsGpuMain._newCounters()
         # init buffers and texture
+        self._uploadRing = None
         self._clear()
 
 
@@ -58,15 +157,85 @@ class FsGpuMain():
     def getTotalSize(self):
         return self._pageSize * self._nbPages
     def getTexture(self):
+        # The texture is replaced when the file system grows or shrinks
         return self._texture
+    def getStorage(self):
+        # > numpy.ndarray (nbPages x pageSize*nbComp) or None
+        return self._storage
 
 
     # ----------------------------------------------------
     # PRIVATE METHODS
     # ----------------------------------------------------
+    @staticmethod
+    def _newCounters():
+        return {"allocs"     : 0,
+                "frees"      : 0,
+                "reallocs"   : 0,
+                "moves"      : 0,
+                "uploads"    : 0,
+                "uploadBytes": 0,
+                }
+
+    def _count(self, name, value=1):
+        self._frameCounters[name] += value
+
+    # All the texture writes go through this method (to count them)
+    def _textureWrite(self, data, viewport=None):
+        if self._uploadRing != None:
+            if viewport == None:
+                viewport = (0, 0, self._pageSize, self._nbPages)
+            self._uploadRing.upload(self._texture, data, viewport)
+        elif viewport == None:
+            self._texture.write(data)
+        else:
+            self._texture.write(data, viewport=viewport)
+        self._frameCounters["uploads"    ] += 1
+        self._frameCounters["uploadBytes"] += memoryview(data).nbytes
+
     def _clear(self):
         # create buffers
-        self._pages = [FsGpuBuffer(self._pageSize) for N in range(self._nbPages)]
+        self._storage = None
+        if FsGpuMain.USE_NUMPY:
+            if numpy == None:
+                raise RuntimeError("[ERROR] the numpy storage of the file system needs the numpy package !")
+            self._storage = numpy.zeros((self._nbPages, self._pageSize * self._nbComp), dtype=numpy.float32)
+            self._pages = [FsGpuBuffer(self._pageSize, buffer=self._storage[N]) for N in range(self._nbPages)]
+        else:
+            self._pages = [FsGpuBuffer(self._pageSize) for N in range(self._nbPages)]
+        # slab pages with available slots (block size => one set of page numbers per placement class)
+        self._slabPages = {}
+        for blockSize in self._slabSizes:
+            self._slabPages[blockSize] = [set() for c in range(FsGpuMain.NB_PLACEMENTS)]
+        # placement class of each page (-1 when the page is not reserved)
+        # and index of the largest free block of the pages of each class
+        self._pageClass    = array.array("b", [-1, ] * self._nbPages)
+        self._classIndexes = [FsGpuIndex(self._nbPages) for c in range(FsGpuMain.NB_PLACEMENTS)]
+        # index of the largest free block of each page
+        self._pageIndex = FsGpuIndex(self._nbPages)
+        for page in range(self._nbPages):
+            self._updatePageIndex(page)
+        # used size of all the pages (updated by alloc, free and realloc), so the
+        # occupancy is known without looking at all the pages
+        self._usedSize = 0
+        # next page to compact
+        self._defragPage = 0
+        # next block header to check (integrity scrubber)
+        self._scrubPage   = 0
+        self._scrubOffset = 0
+        self._scrubError  = None
+        # pages with modified parts to copy into the texture (staging mode)
+        self._dirtyPages = set()
+        if FsGpuMain.USE_STAGING and not FsGpuMain.USE_LOCAL_FS_BUFFER:
+            raise RuntimeError("[ERROR] the staging mode of the file system needs the local FS buffer (USE_LOCAL_FS_BUFFER) !")
+        # upload ring
+        if self._uploadRing != None:
+            self._uploadRing.release()
+            self._uploadRing = None
+        if FsGpuMain.USE_UPLOAD_RING:
+            if not FsGpuMain.USE_STAGING:
+                raise RuntimeError("[ERROR] the upload ring of the file system needs the staging mode (USE_STAGING) !")
+            self._uploadRing = FsGpuUploadRing(self._ctx, FsGpuMain.UPLOAD_RING_FRAMES)
         # Create texture from context
         self._texture = self._ctx.texture((self._pageSize, self._nbPages), self._nbComp, dtype="f4")
 
@@ -82,46 +251,480 @@ class FsGpuMain():
         page     = (id >> self._pageShift) & self._pageMask
         return (offset, page)
 
+    # Update the page indexes. An empty standard page is released from its placement class
+    def _updatePageIndex(self, page):
+        buf     = self._pages[page]
+        largest = buf.getLargestFreeBlock()
+        self._pageIndex.set(page, largest)
+        c = self._pageClass[page]
+        if c >= 0:
+            if buf.getNbUsedBlocks() == 0 and not isinstance(buf, FsGpuSlab):
+                self._pageClass[page] = -1
+                largest = -1
+            self._classIndexes[c].set(page, largest)
+
+    # Get the max number of pages (texture height and block ID format)
+    def _getMaxNbPages(self):
+        maxPages = int(self._maxPages)
+        maxSize  = self._ctx.info.get("GL_MAX_TEXTURE_SIZE", 0)
+        if maxSize > 0:
+            maxPages = min(maxPages, maxSize)
+        if FsGpuMain.MAX_NB_PAGES > 0:
+            maxPages = min(maxPages, FsGpuMain.MAX_NB_PAGES)
+        return maxPages
+
+    # Copy the first rows of a texture into another one (GPU-side)
+    def _copyTexture(self, src, dst):
+        srcFbo = self._ctx.framebuffer(color_attachments=[src])
+        dstFbo = self._ctx.framebuffer(color_attachments=[dst])
+        self._ctx.copy_framebuffer(dstFbo, srcFbo)
+        srcFbo.release()
+        dstFbo.release()
+
+    # Change the number of pages. The existing pages keep their number and content
+    # (removed pages must be empty). The texture is reallocated and the remaining rows
+    # are copied GPU-side
+    def _resize(self, nbPages):
+        oldNbPages = self._nbPages
+        nbKeep     = min(oldNbPages, nbPages)
+        # Page buffers
+        del self._pages[nbKeep:]
+        if self._storage is not None:
+            storage = numpy.zeros((nbPages, self._pageSize * self._nbComp), dtype=numpy.float32)
+            storage[:nbKeep] = self._storage[:nbKeep]
+            self._storage = storage
+            for page in range(nbKeep):
+                self._pages[page].setData(storage[page])
+            self._pages += [FsGpuBuffer(self._pageSize, buffer=storage[N]) for N in range(nbKeep, nbPages)]
+        else:
+            self._pages += [FsGpuBuffer(self._pageSize) for N in range(nbKeep, nbPages)]
+        self._nbPages = nbPages
+        # Page classes and indexes
+        del self._pageClass[nbKeep:]
+        self._pageClass.extend([-1, ] * (nbPages - nbKeep))
+        self._classIndexes = [FsGpuIndex(self._nbPages) for c in range(FsGpuMain.NB_PLACEMENTS)]
+        self._pageIndex = FsGpuIndex(self._nbPages)
+        for page in range(self._nbPages):
+            self._updatePageIndex(page)
+        self._defragPage %= self._nbPages
+        if self._scrubPage >= self._nbPages:
+            self._scrubPage   = 0
+            self._scrubOffset = 0
+        self._dirtyPages = {page for page in self._dirtyPages if page < nbPages}
+        # Texture
+        texture = self._ctx.texture((self._pageSize, self._nbPages), self._nbComp, dtype="f4")
+        self._copyTexture(self._texture, texture)
+        self._texture.release()
+        self._texture = texture
+
+    # Add pages (geometric growth) so that a block of this size can be stored
+    # Returns False if the file system cannot grow
+    def _grow(self, blockSize):
+        if not FsGpuMain.GROWABLE or blockSize > self._pages[0].getBufferSize():
+            return False
+        maxPages = self._getMaxNbPages()
+        if self._nbPages >= maxPages:
+            return False
+        nbPages = max(self._nbPages + 1, math.ceil(self._nbPages * FsGpuMain.GROWTH_FACTOR))
+        self._resize(min(nbPages, maxPages))
+        return True
+
+    # Remove the empty pages at the end of the file system (down to nbPages at least)
+    # The pages with blocks cannot be removed as the block IDs must remain valid
+    def _shrink(self, nbPages):
+        nbPages = max(nbPages, self._initNbPages)
+        N = self._nbPages
+        while N > nbPages and self._pages[N - 1].getNbUsedBlocks() == 0:
+            N -= 1
+            # Forget the empty slab pages
+            buf = self._pages[N]
+            if isinstance(buf, FsGpuSlab):
+                self._slabPages[buf.getSlotSize()][self._pageClass[N]].discard(N)
+                self._pageClass[N] = -1
+        if N < self._nbPages:
+            self._resize(N)
+
+    # Shrink the file system after a long period of low occupancy
+    def _checkShrink(self):
+        if FsGpuMain.SHRINK_OCCUPANCY <= 0 or self._nbPages <= self._initNbPages:
+            return
+        if self._usedSize < self.getTotalSize() * self._nbComp * FsGpuMain.SHRINK_OCCUPANCY:
+            self._lowOccupancyFrames += 1
+        else:
+            self._lowOccupancyFrames = 0
+        if self._lowOccupancyFrames >= FsGpuMain.SHRINK_DELAY:
+            self._lowOccupancyFrames = 0
+            self._shrink(math.ceil(self._nbPages / FsGpuMain.GROWTH_FACTOR))
+
+    # Get the placement class from the optional placement and searchFromEnd parameters
+    def _getPlacement(self, placement, searchFromEnd):
+        if placement == None:
+            return FsGpuMain.PLACEMENT_STATIC if searchFromEnd else FsGpuMain.PLACEMENT_DYNAMIC
+        if placement < 0 or placement >= FsGpuMain.NB_PLACEMENTS:
+            raise RuntimeError(f"[ERROR] bad placement class : placement={placement} !")
+        return placement
+
+    # Get the first/last empty page (not reserved by any class) or None
+    def _findEmptyPage(self, placement):
+        size = self._pages[0].getBufferSize()
+        if placement == FsGpuMain.PLACEMENT_STATIC:
+            return self._pageIndex.findLast(size)
+        return self._pageIndex.findFirst(size)
+
+    # Get a page with a free block big enough (or None) :
+    # - first a page of the placement class (first or last page, for static blocks)
+    # - else an empty page that is reserved for this class
+    # - else any page with enough room
+    def _findPage(self, blockSize, placement):
+        fromEnd = placement == FsGpuMain.PLACEMENT_STATIC
+        index   = self._classIndexes[placement]
+        page    = index.findLast(blockSize) if fromEnd else index.findFirst(blockSize)
+        if page != None:
+            return page
+        page = self._findEmptyPage(placement)
+        if page != None:
+            self._pageClass[page] = placement
+            return page
+        if fromEnd:
+            return self._pageIndex.findLast(blockSize)
+        return self._pageIndex.findFirst(blockSize)
+
+    # Update the page information after an allocation
+    def _afterAlloc(self, page):
+        buf = self._pages[page]
+        if isinstance(buf, FsGpuSlab):
+            if buf.isFull():
+                self._slabPages[buf.getSlotSize()][self._pageClass[page]].discard(page)
+        else:
+            self._updatePageIndex(page)
+
+    # Get a slab page with available slots for this block size
+    # If there is none, an empty page is reserved and formatted as a slab
+    # (if there is no empty page, a slab page of another class is used)
+    def _getSlabPage(self, userSize, placement):
+        blockSize = self._pages[0].getBlockSize(userSize)
+        for page in self._slabPages[blockSize][placement]:
+            return page
+        # Find an empty page
+        page = self._findEmptyPage(placement)
+        if page == None and self._grow(self._pages[0].getBufferSize()):
+            page = self._findEmptyPage(placement)
+        if page == None:
+            for avail in self._slabPages[blockSize]:
+                for page in avail:
+                    return page
+            raise RuntimeError(f"[ERROR] no empty page available to create a new slab. May be the memory is full. userSize={userSize} !")
+        # Replace the page buffer by a slab (using the same storage)
+        self._replacePage(page, FsGpuSlab(self._pageSize, userSize, buffer=self._pages[page].getData()))
+        self._pageClass[page] = placement
+        self._slabPages[blockSize][placement].add(page)
+        self._updatePageIndex(page)
+        return page
+
+    # Release an empty slab page (the page becomes a standard page buffer again)
+    # We keep it if this is the last slab page with available slots for this size
+    # and class, in order to avoid formatting pages again and again
+    def _releaseSlabPage(self, page):
+        slab = self._pages[page]
+        avail = self._slabPages[slab.getSlotSize()][self._pageClass[page]]
+        if len(avail) <= 1:
+            return
+        avail.remove(page)
+        self._replacePage(page, FsGpuBuffer(self._pageSize, buffer=slab.getData()))
+        self._updatePageIndex(page)
+
+    # Replace the object managing a page (same storage) : the parts of the page
+    # not uploaded yet (staging mode) are still dirty in the new object
+    def _replacePage(self, page, buf):
+        old = self._pages[page]
+        self._pages[page] = buf
+        if FsGpuMain.USE_STAGING:
+            for start, end in old.popDirtySpans():
+                buf.markDirty(start, end)
+
+    # Move a block into a new block (with another size and/or placement class)
+    # The user data is copied (local FS buffer only, else the caller must write it again),
+    # the old block is released and the relocation callbacks are notified
+    def _moveBlock(self, blockID, userSize, placement):
+        offset, page = self._explodeID(blockID)
+        buf      = self._pages[page]
+        data     = buf.getData()
+        userType = int(data[offset + FsGpuBuffer.TYPE])
+        oldSize  = int(data[offset + FsGpuBuffer.SIZE])
+        newID    = self.alloc(userSize, userType, placement=placement)
+        if FsGpuMain.USE_LOCAL_FS_BUFFER:
+            values = buf.read(offset, min(oldSize, userSize))
+            offset2, page2 = self._explodeID(newID)
+            self._pages[page2].write(offset2, values)
+            start = offset2 + FsGpuBuffer.OVERHEAD
+            self._writeRange(page2, start, start + len(values))
+        self.free(blockID)
+        self._count("moves")
+        # notify the block owners
+        relocations = {blockID: newID}
+        for callback in self._relocationCallbacks:
+            callback(relocations)
+        return newID
+
+    # copy a part of a local page buffer into the texture
+    # start and end are offsets in the page buffer (multiple of nbComp)
+    def _uploadRange(self, page, start, end):
+        end  = ((end + self._nbComp - 1) // self._nbComp) * self._nbComp
+        data = memoryview(self._pages[page].getData())[start:end]
+        self._textureWrite(data, viewport=(start//self._nbComp, page, (end-start)//self._nbComp, 1))
+
+    # copy a part of a local page buffer into the texture, now or during
+    # the render step (staging mode)
+    def _writeRange(self, page, start, end):
+        if FsGpuMain.USE_STAGING:
+            self._markDirty(page, start, end)
+        else:
+            self._uploadRange(page, start, end)
+
+    # register a modified part of a local page buffer (staging mode)
+    def _markDirty(self, page, start, end):
+        self._pages[page].markDirty(start, end, FsGpuMain.STAGING_MERGE_GAP * self._nbComp)
+        self._dirtyPages.add(page)
+
+    # copy all the modified parts of the local page buffers into the texture
+    # (through the buffers of the next frame of the upload ring, if any)
+    def _flushStaging(self):
+        if self._uploadRing != None:
+            self._uploadRing.beginFrame()
+        maxGap = FsGpuMain.STAGING_MERGE_GAP * self._nbComp
+        for page in sorted(self._dirtyPages):
+            for start, end in self._pages[page].popDirtySpans(maxGap):
+                self._uploadRange(page, start, end)
+        self._dirtyPages.clear()
+        if self._uploadRing != None:
+            self._uploadRing.endFrame()
+
     # ----------------------------------------------------
     # PUBLIC API
     # ----------------------------------------------------
-    # the ascending parameter is used to go through the pages
-    # in order to find a valid available space (from tge beginning or the end)
+    # the placement parameter gives the class of pages where the block is stored
+    # (dynamic, static or transient). When it is not given, the searchFromEnd parameter
+    # selects the static class (pages from the end) or the dynamic one (from the beginning)
+    # The page indexes directly give the first (or last) page with a big enough free block
     # The page number AND the buffer offset are gathered and returned as a buffer ID
-    def alloc(self, userSize, userType, searchFromEnd=False, data=None):
-        # Init vars
-        step   = 1
-        offset = None
-        page = 0
-        if searchFromEnd:
-            step = -1
-            page = len(self._pages)-1
-        # Process allocation
-        while offset == None:
-            # check current page number
-            if not self._isPageOK(page):
-                dmp = self.dump()
-                raise RuntimeError(f"[ERROR] page number is not correct during allocation. May be the memory is full, or the requested start page is not correct. page={page} !\n" + dmp)
-            # Try to allocate a block into the current page (can return None if no available space)
-            offset = self._pages[page].alloc(userSize, userType)
-            # Go to next page (if needed)
-            page += step
-        # Here we have a valid offset, get block ID (page must be -1 because of the loop)
-        id = self._createID(offset, page - step)
+    def alloc(self, userSize, userType, searchFromEnd=False, data=None, placement=None):
+        placement = self._getPlacement(placement, searchFromEnd)
+        # Get the first/last page that can store the block
+        blockSize = self._pages[0].getBlockSize(userSize)
+        if blockSize in self._slabSizes:
+            page = self._getSlabPage(userSize, placement)
+        else:
+            page = self._findPage(blockSize, placement)
+            if page == None and self._grow(blockSize):
+                page = self._findPage(blockSize, placement)
+        if page == None:
+            raise RuntimeError(f"[ERROR] no page can store the requested block. May be the memory is full. userSize={userSize} largestFreeBlock={self._pageIndex.getMax()} !")
+        # Allocate the block into this page
+        buf    = self._pages[page]
+        used   = buf.getUsedSize()
+        offset = buf.alloc(userSize, userType)
+        if offset == None:
+            raise RuntimeError(f"[ERROR] the page index is not correct : impossible to allocate userSize={userSize} in page={page} !")
+        self._usedSize += buf.getUsedSize() - used
+        self._afterAlloc(page)
+        self._count("allocs")
+        # Here we have a valid offset, get block ID
+        id = self._createID(offset, page)
         # Fill the buffer if requested
-        if data != None:
+        if data is not None:
             self.write2Texture(id, data)
         # return block ID
         return id
 
+    # Allocate several blocks with the same size and type.
+    # The blocks are stored contiguously as much as possible
+    # (in the same page, one after the other), so they can be written
+    # in a single operation with writeMany. It returns the list of block IDs
+    def allocMany(self, count, userSize, userType, searchFromEnd=False, placement=None):
+        placement = self._getPlacement(placement, searchFromEnd)
+        blockSize = self._pages[0].getBlockSize(userSize)
+        ids = []
+        while len(ids) < count:
+            if blockSize in self._slabSizes:
+                page = self._getSlabPage(userSize, placement)
+            else:
+                # First try to find a page that can store all the remaining blocks
+                page = self._findPage((count - len(ids)) * blockSize, placement)
+                if page == None:
+                    page = self._findPage(blockSize, placement)
+                if page == None and self._grow(blockSize):
+                    page = self._findPage(blockSize, placement)
+                if page == None:
+                    raise RuntimeError(f"[ERROR] no page can store the requested blocks. May be the memory is full. count={count} userSize={userSize} allocated={len(ids)} !")
+            buf  = self._pages[page]
+            used = buf.getUsedSize()
+            for offset in buf.allocMany(count - len(ids), userSize, userType):
+                ids.append(self._createID(offset, page))
+            self._usedSize += buf.getUsedSize() - used
+            self._afterAlloc(page)
+        self._count("allocs", count)
+        return ids
+
     def free(self, blockID):
         # retrieve block position information
         offset, page = self._explodeID(blockID)
         if not self._isPageOK(page):
             raise RuntimeError(f"[ERROR] bad page value from block ID ! id={blockID} - page={page} - offset={offset}")
         # Now free this block from the memory
-        self._pages[page].free(offset)
+        buf  = self._pages[page]
+        used = buf.getUsedSize()
+        buf.free(offset)
+        self._usedSize += buf.getUsedSize() - used
+        self._count("frees")
+        if isinstance(buf, FsGpuSlab):
+            self._slabPages[buf.getSlotSize()][self._pageClass[page]].add(page)
+            if buf.isEmpty():
+                self._releaseSlabPage(page)
+        else:
+            self._updatePageIndex(page)
+
+    # Change the size of a block. The block is resized in place when possible
+    # (the tail is released, or the block is extended into the next free block),
+    # else a new block is allocated (in the same placement class), the user data is copied
+    # (local FS buffer only, else the caller must write it again) and the old block is released.
+    # The relocation callbacks are notified if the block has moved.
+    # It returns the (new) block ID
+    def realloc(self, blockID, userSize):
+        offset, page = self._explodeID(blockID)
+        if not self._isPageOK(page):
+            raise RuntimeError(f"[ERROR] bad page value from block ID ! id={blockID} - page={page} - offset={offset}")
+        buf = self._pages[page]
+        self._count("reallocs")
+        # Try in place first (a block size handled by slabs must go into a slab)
+        blockSize = buf.getBlockSize(userSize)
+        inSlab    = isinstance(buf, FsGpuSlab)
+        used      = buf.getUsedSize()
+        if inSlab == (blockSize in self._slabSizes) and buf.resize(offset, userSize):
+            self._usedSize += buf.getUsedSize() - used
+            if not inSlab:
+                self._updatePageIndex(page)
+            return blockID
+        # Move the block into a new one
+        placement = self._pageClass[page]
+        if placement < 0:
+            placement = FsGpuMain.PLACEMENT_DYNAMIC
+        return self._moveBlock(blockID, userSize, placement)
+
+    # Move a block into a page of another placement class (when its write frequency
+    # has changed). Nothing is done if the block is already in a page of this class.
+    # It returns the (new) block ID
+    def migrate(self, blockID, placement):
+        placement = self._getPlacement(placement, False)
+        offset, page = self._explodeID(blockID)
+        if not self._isPageOK(page):
+            raise RuntimeError(f"[ERROR] bad page value from block ID ! id={blockID} - page={page} - offset={offset}")
+        if self._pageClass[page] == placement:
+            return blockID
+        userSize = int(self._pages[page].getData()[offset + FsGpuBuffer.SIZE])
+        return self._moveBlock(blockID, userSize, placement)
+
+    def getPlacement(self, blockID):
+        offset, page = self._explodeID(blockID)
+        return self._pageClass[page]
 
+    # Texel coordinates (x, y) of the user data of a block in the texture
+    def getTexelCoords(self, blockID):
+        offset, page = self._explodeID(blockID)
+        return ((offset + FsGpuBuffer.OVERHEAD) // self._nbComp, page)
+
+
+    # Copy a whole local page buffer into the texture
+    def uploadPage(self, page):
+        self._textureWrite(self._pages[page].getData(), viewport=(0, page, self._pageSize, 1))
+
+    # Copy all the local page buffers into the texture
+    # (in a single write, without any copy, when using the numpy storage)
+    def uploadAll(self):
+        if self._storage is not None:
+            self._textureWrite(self._storage)
+        else:
+            for page in range(self._nbPages):
+                self.uploadPage(page)
+
+    # All the blocks with the same size as the given user size will be stored
+    # in slab pages (pages reserved for one single block size)
+    def addSlabSize(self, userSize):
+        blockSize = self._pages[0].getBlockSize(userSize)
+        self._slabSizes.add(blockSize)
+        if blockSize not in self._slabPages:
+            self._slabPages[blockSize] = [set() for c in range(FsGpuMain.NB_PLACEMENTS)]
+
+    # Register a function called with the relocation map (old blockID => new blockID)
+    # each time some blocks are moved in the file system
+    def addRelocationCallback(self, callback):
+        self._relocationCallbacks.append(callback)
+
+    # Compaction of the pages : used blocks are moved towards the beginning of their page.
+    # The pages are processed one after the other (starting from the last unfinished one)
+    # until the time budget (in seconds) is consumed. The moved parts of the pages
+    # are copied into the texture, and the relocation callbacks are notified.
+    # It returns the relocation map (old blockID => new blockID)
+    def defrag(self, timeBudget):
+        if not FsGpuMain.USE_LOCAL_FS_BUFFER:
+            raise RuntimeError("[ERROR] the compaction of the file system needs the local FS buffer (USE_LOCAL_FS_BUFFER) !")
+        relocations = {}
+        deadline = time.perf_counter() + timeBudget
+        for i in range(self._nbPages):
+            page = self._defragPage
+            buf  = self._pages[page]
+            if buf.isFragmented():
+                pageReloc = buf.defrag(deadline)
+                self._updatePageIndex(page)
+                if len(pageReloc) > 0:
+                    # Copy the moved area into the texture
+                    start = min(pageReloc.values())
+                    end   = max(pageReloc.values())
+                    end  += int(buf.getData()[end + FsGpuBuffer.LENG])
+                    self._writeRange(page, start, end)
+                    # Convert offsets into block IDs
+                    for old in pageReloc:
+                        relocations[self._createID(old, page)] = self._createID(pageReloc[old], page)
+                # Stay on this page if it is not finished
+                if buf.isFragmented():
+                    break
+            self._defragPage = (page + 1) % self._nbPages
+            if time.perf_counter() >= deadline:
+                break
+        # notify the block owners
+        if len(relocations) > 0:
+            self._count("moves", len(relocations))
+            for callback in self._relocationCallbacks:
+                callback(relocations)
+        return relocations
+
+    # Integrity scrubber : check up to nbBlocks block headers (and the free block
+    # tables of the pages), from the last checked one, within the time budget (in seconds,
+    # 0 means no limit). The pages modified behind the cursor are checked again
+    # from their lowest modified header.
+    # It returns the first corruption found (a one-line diagnostic) or None.
+    # Once a corruption has been found, the scrubber does not check anything else
+    def scrub(self, nbBlocks, timeBudget=0.0):
+        if self._scrubError != None:
+            return self._scrubError
+        deadline = time.perf_counter() + timeBudget if timeBudget > 0 else None
+        while nbBlocks > 0:
+            page = self._scrubPage
+            buf  = self._pages[page]
+            offset, N, error = buf.scrub(self._scrubOffset, nbBlocks, deadline)
+            if error != None:
+                self._scrubError = f"[ERROR] FS corruption page={page} {error}"
+                break
+            nbBlocks -= N
+            self._scrubOffset = offset
+            if offset >= buf.getBufferSize():
+                self._scrubPage   = (page + 1) % self._nbPages
+                self._scrubOffset = 0
+            if deadline != None and time.perf_counter() >= deadline:
+                break
+        return self._scrubError
+
+    def getScrubError(self):
+        return self._scrubError
 
     def readFromTexture(self, id):
         # retrieve block position information
@@ -135,63 +738,295 @@ class FsGpuMain():
             # compare gpuData and cpuData to be sure there is no issue somewhere in the dataflow
             # TODO
 
-    def write2Texture(self, id, data):
+    # Write the values into the block, from the subOffset position in the user data
+    # (only the modified texels of a block can be copied)
+    def write2Texture(self, id, data, subOffset=0):
         # retrieve block position information
         offset, page = self._explodeID(id)
         # Write into the CPU array.array (that is a CPU copy of the file system)
         if FsGpuMain.USE_LOCAL_FS_BUFFER :
-            self._pages[page].write(offset, data)
+            self._pages[page].write(offset, data, subOffset)
+            # In staging mode, the texture will be updated during the render step
+            if FsGpuMain.USE_STAGING:
+                start = offset + FsGpuBuffer.OVERHEAD + subOffset
+                self._markDirty(page, start, start + len(data))
+                return
         # write block data directly to texture
-        offset = (offset + FsGpuBuffer.OVERHEAD)//self._nbComp
-        self._texture.write(data, viewport=(offset, page, len(data)//self._nbComp, 1))
+        offset = (offset + FsGpuBuffer.OVERHEAD + subOffset)//self._nbComp
+        self._textureWrite(data, viewport=(offset, page, len(data)//self._nbComp, 1))
+
+
+    # Write the same amount of values into several blocks, from the subOffset
+    # position in their user data.
+    # data is a 2D numpy array (one row per block) or a list of value arrays.
+    # The values are copied into the local page buffers, then the written parts
+    # of the blocks are copied into the texture : the parts only separated by
+    # a block header (whole adjacent blocks) are merged in a single write
+    # (in staging mode, the parts are merged according to STAGING_MERGE_GAP)
+    def writeMany(self, ids, data, subOffset=0):
+        isArray = numpy != None and isinstance(data, numpy.ndarray)
+        maxGap  = FsGpuBuffer.OVERHEAD
+        # Gather the blocks per page
+        byPage = {}
+        for i in range(len(ids)):
+            offset, page = self._explodeID(ids[i])
+            if page not in byPage:
+                byPage[page] = ([], [])
+            byPage[page][0].append(offset)
+            byPage[page][1].append(i)
+        for page in byPage:
+            offsets, indexes = byPage[page]
+            if isArray:
+                values = data[indexes]
+            else:
+                values = [data[i] for i in indexes]
+            buf = self._pages[page]
+            buf.writeMany(offsets, values, subOffset)
+            # Copy the written parts (merged when they are contiguous)
+            length = len(values[0])
+            first  = FsGpuBuffer.OVERHEAD + subOffset
+            offsets = sorted(offsets)
+            start = offsets[0] + first
+            end   = start + length
+            for offset in offsets[1:]:
+                if offset + first - end > maxGap:
+                    self._writeRange(page, start, end)
+                    start = offset + first
+                end = offset + first + length
+            self._writeRange(page, start, end)
 
 
     # ----------------------------------------------------
     # APP PROCESS
     # ----------------------------------------------------
     def update(self, deltaTime):
-        pass
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        # The free blocks are coalesced with both their neighbours when released,
+        # and the pages can be compacted according to the frame time budget
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        if FsGpuMain.DEFRAG_TIME_BUDGET > 0 and FsGpuMain.USE_LOCAL_FS_BUFFER:
+            self.defrag(FsGpuMain.DEFRAG_TIME_BUDGET)
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~
-        # We will call the page buffer defrag process, and according
-        # to the frame time, we will see how many pages we can defrag in-a-row
+        # Growable file system : remove the last pages if they are
+        # not used for a long time
         # ~~~~~~~~~~~~~~~~~~~~~~~~
-        # TODO : For the moment we only defrag one page
-        # TODO : improve defrag process (or algorithm underneath) because it drops the perfs !!
-#        for page in self._pages:
-#            res = page.defrag()
-#            if res:
-#                break
+        if FsGpuMain.GROWABLE:
+            self._checkShrink()
 
         # ~~~~~~~~~~~~~~~~~~~~~~~~
-        # Browse all buffers and check their 'modified' property
-        # copy the buffer data into the texture and call resetModify()
-        # when finished
+        # Check a few block headers each frame : the corruptions are
+        # found close to the operation that caused them
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        if FsGpuMain.SCRUB_BLOCKS > 0 and self._scrubError == None:
+            error = self.scrub(FsGpuMain.SCRUB_BLOCKS, FsGpuMain.SCRUB_TIME_BUDGET)
+            if error != None:
+                if FsGpuMain.SCRUB_RAISE:
+                    raise RuntimeError(error)
+                print(error, file=sys.stderr)
+
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        # The static blocks are stored at the end of the memory, and the
+        # dynamic/transient ones at the beginning, in separate pages (placement classes).
+        # The blocks are migrated by their owners (migrate) when their write
+        # frequency changes
         # ~~~~~~~~~~~~~~~~~~~~~~~~
-        # As there is a way to fill data from the bottom page of the FS
-        # this could be efficient to put all static blocks at the end of the
-        # memory, and the static ones at the beginning
-
-        # TODO : may be force a page to allocate blocks, in order to handle
-        # which pages are willing to be modified or not
-        # TODO : this process can be improved by getting the small parts
-        #        of the buffers that have been modified, instead of rewriting
-        #        the whole buffer
-#        i = 0
-#        while i < self._nbPages:
-#            p = self._pages[i]
-#            if p.isModified():
-#                # print(f"[FS GPU] Writing page #{i} into the GPU texture")
-#                # write this page into the texture
-#                self._texture.write(p.getData(), viewport=(0, i, self._pageSize, 1))
-#                # buffer has been updated into the texture
-#                # reset flag
-#                p.resetModify()
-#            # print(f"PAGE WRITE = {lap2-lap1}")
-#            i += 1
 
     def render(self):
-        pass
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        # In staging mode, browse the modified pages and copy their
+        # modified parts (merged) into the texture
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        if FsGpuMain.USE_STAGING:
+            self._flushStaging()
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        # End of frame for the operation counters
+        # ~~~~~~~~~~~~~~~~~~~~~~~~
+        self._endFrameCounters()
+
+
+    # ----------------------------------------------------
+    # SNAPSHOT
+    # ----------------------------------------------------
+    # Offset of the page data in a snapshot file (aligned, so the data can be mapped)
+    @staticmethod
+    def _getSnapshotDataOffset(nbPages, nbFree):
+        offset  = FsGpuMain.SNAPSHOT_HEADER.size
+        offset += FsGpuMain.SNAPSHOT_PAGE.size * nbPages
+        offset += 4 * nbFree
+        align   = FsGpuMain.SNAPSHOT_ALIGN
+        return ((offset + align - 1) // align) * align
+
+    # Save the pages (block headers and data) and their free block tables into a file.
+    # The file uses the native byte order for the free offsets and the page data
+    def save(self, path):
+        if not FsGpuMain.USE_LOCAL_FS_BUFFER:
+            raise RuntimeError("[ERROR] the snapshot of the file system needs the local FS buffer (USE_LOCAL_FS_BUFFER) !")
+        table = b""
+        frees = array.array("I")
+        for page in range(self._nbPages):
+            buf = self._pages[page]
+            offsets = buf.getFreeOffsets()
+            slotSize = buf.getSlotSize() if isinstance(buf, FsGpuSlab) else 0
+            table += FsGpuMain.SNAPSHOT_PAGE.pack(slotSize, self._pageClass[page], buf.getNbUsedBlocks(), len(offsets))
+            frees.extend(offsets)
+        dataOffset = FsGpuMain._getSnapshotDataOffset(self._nbPages, len(frees))
+        with open(path, "wb") as f:
+            f.write(FsGpuMain.SNAPSHOT_HEADER.pack(FsGpuMain.SNAPSHOT_MAGIC, self._pageSize, self._nbPages, self._nbComp, len(frees)))
+            f.write(table)
+            f.write(frees.tobytes())
+            f.write(bytes(dataOffset - f.tell()))
+            if self._storage is not None:
+                f.write(memoryview(self._storage))
+            else:
+                for buf in self._pages:
+                    f.write(memoryview(buf.getData()))
+
+    # Load a snapshot file : the pages and the free block tables are restored as they were,
+    # so the saved block IDs are valid again. With the numpy storage, the file is mapped
+    # (copy on write) and used directly as the page storage, else the pages are read.
+    # The whole storage is then copied into the texture (resized if needed)
+    def load(self, path):
+        if not FsGpuMain.USE_LOCAL_FS_BUFFER:
+            raise RuntimeError("[ERROR] the snapshot of the file system needs the local FS buffer (USE_LOCAL_FS_BUFFER) !")
+        with open(path, "rb") as f:
+            magic, pageSize, nbPages, nbComp, nbFree = FsGpuMain.SNAPSHOT_HEADER.unpack(f.read(FsGpuMain.SNAPSHOT_HEADER.size))
+            if magic != FsGpuMain.SNAPSHOT_MAGIC:
+                raise RuntimeError(f"[ERROR] bad snapshot file : {path} !")
+            if pageSize != self._pageSize or nbComp != self._nbComp:
+                raise RuntimeError(f"[ERROR] bad snapshot page size : pageSize={pageSize} nbComp={nbComp} expected={self._pageSize}x{self._nbComp} !")
+            if nbPages > self._getMaxNbPages():
+                raise RuntimeError(f"[ERROR] bad snapshot NB pages : nbPages={nbPages} maxPages={self._getMaxNbPages()} !")
+            table = [FsGpuMain.SNAPSHOT_PAGE.unpack(f.read(FsGpuMain.SNAPSHOT_PAGE.size)) for page in range(nbPages)]
+            frees = array.array("I")
+            frees.fromfile(f, nbFree)
+            dataOffset = FsGpuMain._getSnapshotDataOffset(nbPages, nbFree)
+            length = pageSize * nbComp
+            # Page storage
+            if self._storage is not None:
+                storage = numpy.memmap(path, dtype=numpy.float32, mode="c", offset=dataOffset, shape=(nbPages, length))
+                rows = [storage[page] for page in range(nbPages)]
+            else:
+                storage = None
+                f.seek(dataOffset)
+                rows = []
+                for page in range(nbPages):
+                    row = array.array("f")
+                    row.fromfile(f, length)
+                    rows.append(row)
+        # Page buffers and free block tables
+        self._storage   = storage
+        self._pages     = []
+        self._pageClass = array.array("b", [-1, ] * nbPages)
+        for blockSize in self._slabPages:
+            self._slabPages[blockSize] = [set() for c in range(FsGpuMain.NB_PLACEMENTS)]
+        start = 0
+        for page in range(nbPages):
+            slotSize, placement, nbUsed, nbPageFree = table[page]
+            if slotSize > 0:
+                buf = FsGpuSlab(pageSize, slotSize - FsGpuBuffer.OVERHEAD, buffer=rows[page], format=False)
+                if slotSize not in self._slabPages:
+                    self._slabSizes.add(slotSize)
+                    self._slabPages[slotSize] = [set() for c in range(FsGpuMain.NB_PLACEMENTS)]
+            else:
+                buf = FsGpuBuffer(pageSize, buffer=rows[page], format=False)
+            # The page is not formatted : its headers and free blocks come from the snapshot
+            buf.restore(rows[page], frees[start:start + nbPageFree], nbUsed)
+            start += nbPageFree
+            self._pages.append(buf)
+            self._pageClass[page] = placement
+            if slotSize > 0 and placement >= 0 and not buf.isFull():
+                self._slabPages[slotSize][placement].add(page)
+        # Indexes and cursors
+        self._nbPages      = nbPages
+        self._classIndexes = [FsGpuIndex(nbPages) for c in range(FsGpuMain.NB_PLACEMENTS)]
+        self._pageIndex    = FsGpuIndex(nbPages)
+        for page in range(nbPages):
+            self._updatePageIndex(page)
+        self._usedSize     = sum(buf.getUsedSize() for buf in self._pages)
+        self._defragPage   = 0
+        self._dirtyPages.clear()
+        # Runtime state of the previous storage : the scrubber starts again (an error
+        # found before does not disable it), and the loaded size is the shrink baseline
+        self._scrubPage    = 0
+        self._scrubOffset  = 0
+        self._scrubError   = None
+        self._initNbPages  = nbPages
+        self._lowOccupancyFrames = 0
+        # Texture
+        if self._texture.size != (pageSize, nbPages):
+            self._texture.release()
+            self._texture = self._ctx.texture((pageSize, nbPages), self._nbComp, dtype="f4")
+        self.uploadAll()
+
+
+    # ----------------------------------------------------
+    # STATS
+    # ----------------------------------------------------
+    # All the values are maintained along with the allocations : the stats
+    # can be read at runtime (each frame) without walking the blocks.
+    # Sizes are given in bytes (4 bytes per value)
+    def _endFrameCounters(self):
+        last = self._lastFrameCounters
+        for name in self._frameCounters:
+            self._totalCounters[name] += self._frameCounters[name]
+            last[name] = self._frameCounters[name]
+            self._frameCounters[name] = 0
+
+    def getPageStats(self, page):
+        buf    = self._pages[page]
+        isSlab = isinstance(buf, FsGpuSlab)
+        return {"placement"       : self._pageClass[page],
+                "slabSlotBytes"   : buf.getSlotSize() * 4 if isSlab else 0,
+                "usedBytes"       : buf.getUsedSize() * 4,
+                "freeBytes"       : buf.getFreeSize() * 4,
+                "nbUsedBlocks"    : buf.getNbUsedBlocks(),
+                "nbFreeBlocks"    : buf.getNbFreeBlocks(),
+                "largestFreeBlock": buf.getLargestFreeBlock() * 4,
+                }
+
+    # Fragmentation of the free space of the standard pages :
+    # 0.0 when the free space of each page is in a single block, close to 1.0
+    # when it is spread into small blocks (slab pages are not fragmented)
+    def getFragmentation(self):
+        total   = 0
+        largest = 0
+        for buf in self._pages:
+            if not isinstance(buf, FsGpuSlab):
+                total   += buf.getFreeSize()
+                largest += buf.getLargestFreeBlock()
+        if total == 0:
+            return 0.0
+        return 1.0 - (largest / total)
+
+    # Global stats (the page counters are summed : O(nbPages))
+    # - frame : operation counters of the last rendered frame
+    # - total : operation counters since the creation of the file system
+    def getStats(self):
+        used      = 0
+        free      = 0
+        nbBlocks  = 0
+        nbFree    = 0
+        slabPages = 0
+        for buf in self._pages:
+            used     += buf.getUsedSize()
+            free     += buf.getFreeSize()
+            nbBlocks += buf.getNbUsedBlocks()
+            nbFree   += buf.getNbFreeBlocks()
+            if isinstance(buf, FsGpuSlab):
+                slabPages += 1
+        return {"nbPages"         : self._nbPages,
+                "nbSlabPages"     : slabPages,
+                "totalBytes"      : self.getTotalSize() * self._nbComp * 4,
+                "usedBytes"       : used * 4,
+                "freeBytes"       : free * 4,
+                "nbUsedBlocks"    : nbBlocks,
+                "nbFreeBlocks"    : nbFree,
+                "largestFreeBlock": self._pageIndex.getMax() * 4,
+                "fragmentation"   : self.getFragmentation(),
+                "frame"           : dict(self._lastFrameCounters),
+                "total"           : dict(self._totalCounters),
+                }
 
 
     # ----------------------------------------------------
@@ -213,81 +1048,3 @@ class FsGpuMain():
 
         out += "\n"
         return out
-
-
-    # ----------------------------------------------------
-    # TESTS
-    # ----------------------------------------------------
-    def test002(self):
-        TEST_NUMS = [10,20,50,100,200,500,1000,2000,5000,10000,20000]
-        BSIZE = 8
-        TYPE  = 1
-        data = [10 + i for i in range(BSIZE)]
-        results = []
-        results.append("Nalloc\tTalloc\tNfree\tTfree")
-        for T in TEST_NUMS:
-            # Init buffers
-            allocTime = []
-            freeTime = []
-            blockIDs = []
-            self._clear()
-
-            # Perform tests
-            print("------------------------------------")
-            for N in range(T):
-                # Defrag FS
-                self.update(1/60)
-
-                # Try to free up some buffers
-                if len(blockIDs) > 10:
-                    nbRemove = randint(1,len(blockIDs)//10)
-                    for i in range(nbRemove):
-                        # Free block
-                        idRemove = choice(blockIDs)
-                        time0 = time.time()
-                        self.free(idRemove)
-                        time1 = time.time()
-                        # Add allocation time
-                        freeTime.append(time1 - time0)
-                        # Remove id from list
-                        blockIDs.remove(idRemove)
-
-                # Try to allocate some blocks
-                nbAdd = randint(1, 50)
-                for i in range(nbAdd):
-                    # Allocate block
-                    time0 = time.time()
-                    id = self.alloc(BSIZE, TYPE, data=data)
-                    time1 = time.time()
-                    # Add allocation time
-                    allocTime.append(time1-time0)
-                    # Store block ID
-                    blockIDs.append(id)
-
-            # display FS
-            #self.display()
-
-            res = ""
-            # Compute min, max and average of times
-            summ = round(1000 * sum(allocTime), 2)
-            mini = round(1000 * min(allocTime), 2)
-            maxi = round(1000 * max(allocTime), 2)
-            avrg = round(1000 * sum(allocTime)/len(allocTime), 2)
-            res += f"{len(allocTime)}\t{summ}\t"
-            print(f"ALLOC : N={len(allocTime)}")
-            print(f"    sum={summ}ms mini={mini}ms maxi={maxi}ms average={avrg}ms")
-            # Compute min, max and average of times
-            summ = round(1000 * sum(freeTime), 2)
-            mini = round(1000 * min(freeTime), 2)
-            maxi = round(1000 * max(freeTime), 2)
-            avrg = round(1000 * sum(freeTime)/len(freeTime), 2)
-            res += f"{len(freeTime)}\t{summ}\t"
-            print(f"FREE  : N={len(freeTime)}")
-            print(f"    sum={summ} mini={mini}ms maxi={maxi}ms average={avrg}ms")
-            res = res.replace(".",",")
-            results.append(res)
-
-        print()
-        print("====================================")
-        for r in results:
-            print(r)
\ No newline at end of file
@@ -0,0 +1,161 @@
+import array
+
+from .fsgpu_buffer import FsGpuBuffer
+
+
+class FsGpuSlab(FsGpuBuffer):
+
+    __slots__ = ['_slotSize',
+                 '_userSize',
+                 '_nbSlots',
+                 '_freeSlots',
+                ]
+
+    # ----------------------------------------------------
+    # CONSTRUCTOR
+    # ----------------------------------------------------
+    # A slab is a page reserved for blocks of one single size.
+    # The page is split into fixed slots (header + user data) once for all,
+    # and the free slots are stored in a stack : alloc and free are O(1)
+    # and there is no split or merge process.
+    # The block header layout is the same as in the FsGpuBuffer, so the
+    # block IDs, read and write operations remain unchanged
+    def __init__(self, W, userSize, H=1, nbComp=4, buffer=None, format=True):
+        # Parent constructor (one single free block)
+        super().__init__(W, H, nbComp, buffer, format)
+        # Get slot dimensions
+        self._userSize = ((userSize+self._nbComp-1)//self._nbComp)*self._nbComp
+        self._slotSize = self.getBlockSize(userSize)
+        self._nbSlots  = self._size // self._slotSize
+        self._nbUsed   = 0
+        # Without format, the slot headers and the free slots come from restore
+        if not format:
+            self._freeSlots = array.array("l")
+            return
+        # Remove the free block : the free slots are not handled in the free block list
+        self._removeFreeBlock(0)
+        # Format all the slots (empty)
+        for i in range(self._nbSlots):
+            self._setSlotHeader(i * self._slotSize, FsGpuBuffer.FREE)
+        # The remaining area at the end of the page is a free block that will never be used
+        offset = self._nbSlots * self._slotSize
+        if offset < self._size:
+            L = self._size - offset
+            self._buffer[offset + FsGpuBuffer.TYPE] = FsGpuBuffer.FREE
+            self._buffer[offset + FsGpuBuffer.LENG] = L
+            self._buffer[offset + FsGpuBuffer.SIZE] = L
+            self._buffer[offset + FsGpuBuffer.CHCK] = self._computeCHK(offset)
+        # Stack of free slots (the lowest offsets are on top)
+        self._freeSlots = array.array("l", range((self._nbSlots - 1) * self._slotSize, -1, -self._slotSize))
+        self._modified = True
+
+
+    # ----------------------------------------------------
+    # PROPERTIES
+    # ----------------------------------------------------
+    def getSlotSize(self):
+        return self._slotSize
+    def getNbSlots(self):
+        return self._nbSlots
+    def getNbUsedSlots(self):
+        return self._nbUsed
+    def getNbFreeSlots(self):
+        return len(self._freeSlots)
+    def getNbFreeBlocks(self):
+        return len(self._freeSlots)
+    def getFreeSize(self):
+        return len(self._freeSlots) * self._slotSize
+    def getUsedSize(self):
+        return self._nbUsed * self._slotSize
+    def isEmpty(self):
+        return self._nbUsed == 0
+    def isFull(self):
+        return len(self._freeSlots) == 0
+
+
+    # ----------------------------------------------------
+    # PRIVATE METHODS
+    # ----------------------------------------------------
+    def _setSlotHeader(self, offset, userType):
+        self._buffer[offset + FsGpuBuffer.LENG] = self._slotSize
+        self._buffer[offset + FsGpuBuffer.TYPE] = userType
+        self._buffer[offset + FsGpuBuffer.SIZE] = self._userSize
+        self._buffer[offset + FsGpuBuffer.CHCK] = self._computeCHK(offset)
+
+    # The free slots are not in the free block list (the stack is not checked)
+    def _checkFreeBlock(self, offset, L, header):
+        if L != self._slotSize and offset != self._nbSlots * self._slotSize:
+            return f"{header} : bad slot length (slotSize={self._slotSize})"
+        return None
+
+    # The free blocks are the free slots and the unused remaining area
+    def _checkFreeCount(self, nbFree):
+        nbTail = 1 if self._nbSlots * self._slotSize < self._size else 0
+        if nbFree != len(self._freeSlots) + nbTail:
+            return f"{nbFree} free blocks found but {len(self._freeSlots)} free slots in the stack"
+        return None
+
+
+    # ----------------------------------------------------
+    # PUBLIC API
+    # ----------------------------------------------------
+    # Take the slot on top of the stack. Returns None if the slab is full
+    def alloc(self, userSize, userType):
+        if userType == FsGpuBuffer.FREE:
+            raise RuntimeError(f"[ERROR] cannot allocate a block with a 'FREE' type. Type of block must be different from the value '{FsGpuBuffer.FREE}'")
+        if self.getBlockSize(userSize) != self._slotSize:
+            raise RuntimeError(f"[ERROR] bad user size for this slab : userSize={userSize} slotSize={self._slotSize} !")
+        if len(self._freeSlots) == 0:
+            return None
+        offset = self._freeSlots.pop()
+        self._setSlotHeader(offset, userType)
+        self._noteChange(self._size)
+        self._nbUsed  += 1
+        self._modified = True
+        return offset
+
+    # Take several slots from the stack (contiguous if the slab has not been fragmented yet)
+    def allocMany(self, count, userSize, userType):
+        offsets = []
+        while len(offsets) < count and len(self._freeSlots) > 0:
+            offsets.append(self.alloc(userSize, userType))
+        return offsets
+
+    # Put the slot back on top of the stack
+    def free(self, offset):
+        # Check data integrity
+        self._verifCHK(offset)
+        if offset % self._slotSize != 0 or offset >= self._nbSlots * self._slotSize:
+            raise RuntimeError(f"[ERROR] the block offset {offset} is not a slot of this slab (slotSize={self._slotSize}) !")
+        if self._isFree(offset):
+            raise RuntimeError(f"[ERROR] the block offset {offset} cannot be released as it is ALREADY empty !")
+        self._setSlotHeader(offset, FsGpuBuffer.FREE)
+        self._noteChange(self._size)
+        self._freeSlots.append(offset)
+        self._nbUsed  -= 1
+        self._modified = True
+        return True
+
+    # The slots all have the same length : a block can only be "resized" to the same slot size
+    def resize(self, offset, userSize):
+        return self.getBlockSize(userSize) == self._slotSize
+
+    # Offsets of the free slots, in the stack order
+    def getFreeOffsets(self):
+        return array.array("I", self._freeSlots)
+
+    # Use a storage already formatted as this slab (e.g. loaded from a snapshot)
+    def restore(self, buffer, freeOffsets, nbUsed):
+        self.setData(buffer)
+        self._freeSlots  = array.array("l", freeOffsets)
+        self._nbUsed     = nbUsed
+        self._dirtySpans = []
+        self._modified   = True
+        self._noteChange(0)
+
+    # The slots are never moved
+    def isFragmented(self):
+        return False
+
+    def defrag(self, deadline=None):
+        return {}
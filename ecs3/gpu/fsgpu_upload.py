@@ -0,0 +1,107 @@
+class FsGpuUploadRing():
+
+    __slots__ = ['_ctx',
+                 '_nbFrames',
+                 '_pools',
+                 '_fences',
+                 '_frame',
+                 '_nbUsed',
+                 '_useFences',
+                ]
+
+    # ----------------------------------------------------
+    # CONSTRUCTOR
+    # ----------------------------------------------------
+    # Ring of pixel buffer objects used to copy the local FS buffer into the texture.
+    # Each frame uses its own pool of buffers (one buffer per uploaded span, as the
+    # texture reads the buffer from its beginning). The pool of a frame is used again
+    # nbFrames later : the GPU has finished reading it most of the time, so the
+    # CPU does not wait for the rendering of the previous frames.
+    # If the context can create fences (fence() method returning an object with
+    # a wait() method), the pool waits for its fence before being used again,
+    # else each buffer is orphaned before being written (the driver gives a new
+    # storage if the previous one is still in use)
+    def __init__(self, ctx, nbFrames=3):
+        if nbFrames < 1:
+            raise RuntimeError(f"[ERROR] bad number of frames for the upload ring : nbFrames={nbFrames} !")
+        self._ctx       = ctx
+        self._nbFrames  = nbFrames
+        self._pools     = [[] for i in range(nbFrames)]
+        self._fences    = [None, ] * nbFrames
+        self._frame     = 0
+        self._nbUsed    = 0
+        self._useFences = hasattr(ctx, "fence")
+
+
+    # ----------------------------------------------------
+    # PROPERTIES
+    # ----------------------------------------------------
+    def getNbFrames(self):
+        return self._nbFrames
+    def getFrame(self):
+        return self._frame
+    def getNbBuffers(self):
+        return sum(len(pool) for pool in self._pools)
+
+
+    # ----------------------------------------------------
+    # PRIVATE METHODS
+    # ----------------------------------------------------
+    # Get the next buffer of the current pool (at least nbBytes long)
+    def _getBuffer(self, nbBytes):
+        pool = self._pools[self._frame]
+        if self._nbUsed < len(pool):
+            buffer = pool[self._nbUsed]
+            if buffer.size < nbBytes:
+                buffer.release()
+                buffer = self._ctx.buffer(reserve=FsGpuUploadRing._roundSize(nbBytes), dynamic=True)
+                pool[self._nbUsed] = buffer
+            elif not self._useFences:
+                buffer.orphan()
+        else:
+            buffer = self._ctx.buffer(reserve=FsGpuUploadRing._roundSize(nbBytes), dynamic=True)
+            pool.append(buffer)
+        self._nbUsed += 1
+        return buffer
+
+    # Buffer sizes are rounded to the next power of 2 (at least 4kB)
+    # so the buffers are not recreated for each new span length
+    @staticmethod
+    def _roundSize(nbBytes):
+        size = 4096
+        while size < nbBytes:
+            size *= 2
+        return size
+
+
+    # ----------------------------------------------------
+    # PUBLIC API
+    # ----------------------------------------------------
+    # Select the pool of the next frame (and wait for the GPU if needed)
+    def beginFrame(self):
+        self._frame  = (self._frame + 1) % self._nbFrames
+        self._nbUsed = 0
+        fence = self._fences[self._frame]
+        if fence != None:
+            fence.wait()
+            self._fences[self._frame] = None
+
+    # Copy the data into a buffer of the pool, then into the texture area
+    # (viewport = x, y, w, h in texels)
+    def upload(self, texture, data, viewport):
+        data   = memoryview(data)
+        buffer = self._getBuffer(data.nbytes)
+        buffer.write(data)
+        texture.write(buffer, viewport=viewport)
+
+    # The GPU will signal the fence once all the uploads of this frame are done
+    def endFrame(self):
+        if self._useFences and self._nbUsed > 0:
+            self._fences[self._frame] = self._ctx.fence()
+
+    def release(self):
+        for pool in self._pools:
+            for buffer in pool:
+                buffer.release()
+        self._pools  = [[] for i in range(self._nbFrames)]
+        self._fences = [None, ] * self._nbFrames
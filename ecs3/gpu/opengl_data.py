@@ -5,7 +5,7 @@ import moderngl
 import moderngl_window
 from pyrr import Matrix44
 
-from ..components.gfx import Gfx
+from ..components.gfx import Gfx, GfxSprite, GfxBox
 from ..gpu.fsgpu_main import FsGpuMain
 from ..shaders.simple_shader import SimpleShader
 from ..systems.gfx_system import GfxSystem
@@ -18,6 +18,8 @@ class OpenGLData():
     # ========================================================
     DEBUG_DISPLAY_QUERY   = False
     DEBUG_DISPLAY_FSGPU   = False
+    # Store the fixed-size Gfx blocks (sprites, boxes) in slab pages
+    USE_GFX_SLABS         = True
     CHANNEL_ATLAS_INFO    = 0
     CHANNEL_ATLAS_TEXTURE = 1
     CHANNEL_FILE_SYSTEM   = 2
@@ -83,6 +85,13 @@ class OpenGLData():
         # instanciate FsGpu
         print(f"\nCreating FsGPU texture : size={sizeW} x {sizeH} x 4 components (32-bit float values)")
         self._fsgpu = FsGpuMain(self.ctx, sizeW, sizeH)
+        if OpenGLData.USE_GFX_SLABS:
+            self._fsgpu.addSlabSize(GfxSprite.NB_VALUES)
+            self._fsgpu.addSlabSize(GfxBox.NB_VALUES)
+            # moving or animated sprites (bullets, particles, characters, ...)
+            self._fsgpu.addSlabSize(GfxSprite.NB_VALUES + dict(Gfx.EXTENSIONS)[Gfx.EXT_MOTION])
+            # faded or scaled sprites (one scalar tween)
+            self._fsgpu.addSlabSize(GfxSprite.NB_VALUES + dict(Gfx.EXTENSIONS)[Gfx.EXT_TWEEN_ALPHA])
 
         # -----------------------------------------------------------------
         # SPRITE BUFFER (VERTEX)
@@ -259,8 +268,14 @@ class OpenGLData():
     # ========================================================================
     #  VIEWPORT CONFIGURATION
     # ========================================================================
-    def updateVertexBuffer(self, data, nbSprites):
-        self._vertexBuffer.write(data)
+    # Only the range of sprites [start, end[ is copied into the buffer
+    # (the whole data by default). The data must contain uint32 values
+    def updateVertexBuffer(self, data, nbSprites, start=0, end=None):
+        if end == None:
+            end = len(data)
+        if start < end:
+            view = memoryview(data)
+            self._vertexBuffer.write(view[start:end], offset=start * view.itemsize)
         self._nbSprites = nbSprites
 
 
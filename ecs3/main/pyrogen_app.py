@@ -21,6 +21,7 @@ from ..systems.scene_system import SceneSystem
 # - static  sprites = 100k
 # both calling the sprite.update() method to check if the
 # array.array must be copied into the GPU texture
+# (now only the modified sprites are flushed from the Gfx stores)
 # ========================================================
 
 
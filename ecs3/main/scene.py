@@ -84,9 +84,15 @@ class Scene():
     def notifyChangeZ(self, ref):
         self._world.notifyChangeZ(ref)
 
+    def notifyChangeBlockID(self, ref):
+        self._world.notifyChangeBlockID(ref)
+
     def notifyChangeScriptPriority(self, ref):
         self._world.notifyChangeScriptPriority(ref)
 
+    def notifyTweenStart(self, ref):
+        self._world.notifyTweenStart(ref)
+
 
     # ========================================================
     # Events
@@ -1,6 +1,7 @@
 from ..components.component  import Component
 from ..systems.gfx_system    import GfxSystem
 from ..systems.script_system import ScriptSystem
+from ..systems.tween_system  import TweenSystem
 from ..systems.input_system import KeyboardSystem, GamepadButtonSystem, GamepadAxisSystem, MouseSystem
 
 
@@ -12,6 +13,8 @@ class World():
         self._gfxSys     = GfxSystem()
         # SCRIPT
         self._scrSys     = ScriptSystem()
+        # TWEEN
+        self._twnSys     = TweenSystem()
         # INPUT
         self._keySys     = KeyboardSystem()
         self._padButtSys = GamepadButtonSystem()
@@ -21,6 +24,8 @@ class World():
 
     # Application process
     def updateSystems(self, deltaTime, systemTime):
+        # The completed tweens write their end value before the gfx update
+        self._twnSys.update(deltaTime, systemTime)
         self._gfxSys.update(deltaTime, systemTime)
         self._scrSys.updateScripts(deltaTime, systemTime)
 
@@ -36,6 +41,8 @@ class World():
             self._gfxSys.addComponent(ref)
         elif type == Component.TYPE_SCRIPT:
             self._scrSys.addComponent(ref)
+        elif type == Component.TYPE_TWEEN:
+            self._twnSys.addComponent(ref)
         elif type== Component.TYPE_KEY:
             self._keySys.addComponent(ref)
         elif type == Component.TYPE_PAD_BUTTON:
@@ -48,17 +55,26 @@ class World():
             raise RuntimeError("[ERROR] Cannot add the component in any system !")
 
     def unregisterComponent(self, ref):
-        print(f"Unregistering a component : {ref} is not IMPLEMENTED YET !!!")
-        pass
+        # The Gfx is not rendered anymore (it can be released then)
+        if ref.getType() == Component.TYPE_GFX:
+            self._gfxSys.removeComponent(ref)
+        else:
+            print(f"Unregistering a component : {ref} is not IMPLEMENTED YET !!!")
 
 
     # Specific events
     def notifyChangeZ(self, ref):
         self._gfxSys.notifyChangeZ(ref)
 
+    def notifyChangeBlockID(self, ref):
+        self._gfxSys.notifyChangeBlockID(ref)
+
     def notifyChangeScriptPriority(self, ref):
         self._scrSys.notifyChangeScriptPriority(ref)
 
+    def notifyTweenStart(self, ref):
+        self._twnSys.notifyTweenStart(ref)
+
 
     # Input Events
     def keyboardEvent(self, keyID, isPressed, modifiers):
@@ -22,6 +22,51 @@ class SimpleShader(Shader):
             #define TYPE_RECTANGLE (3)
             #define TYPE_OVAL      (4)
             #define TYPE_FONT      (5)
+            #define TYPE_PATH      (6)
+
+            // ------------ GFX EXTENSIONS ----------------
+            // flag bits (bits 0-7 of the index 19 of the Gfx data, the position
+            // of the values in texels is stored from the bit 8) and number of texels :
+            // the values of the enabled extensions are stored in this order
+            #define NB_EXTENSIONS         (7)
+            #define EXT_MOTION            (1)
+            #define EXT_MOTION_INDEX      (0)
+            #define EXT_ANIMATION         (2)
+            #define EXT_ANIMATION_INDEX   (1)
+            #define EXT_PATH              (4)
+            #define EXT_PATH_INDEX        (2)
+            #define EXT_TWEEN_SCALE       (8)
+            #define EXT_TWEEN_SCALE_INDEX (3)
+            #define EXT_TWEEN_ANGLE       (16)
+            #define EXT_TWEEN_ANGLE_INDEX (4)
+            #define EXT_TWEEN_ALPHA       (32)
+            #define EXT_TWEEN_ALPHA_INDEX (5)
+            #define EXT_TWEEN_COLOR       (64)
+            #define EXT_TWEEN_COLOR_INDEX (6)
+            const int EXT_TEXELS[NB_EXTENSIONS] = int[NB_EXTENSIONS](2, 2, 2, 1, 1, 1, 2);
+
+            // ------------ ANIMATION LOOP MODES ----------------
+            #define ANIM_ONCE     (0)
+            #define ANIM_LOOP     (1)
+            #define ANIM_PINGPONG (2)
+
+            // ------------ PATH TYPES ----------------
+            #define PATH_CIRCLE    (0)
+            #define PATH_ELLIPSE   (1)
+            #define PATH_RECTANGLE (2)
+            #define PATH_LISSAJOUS (3)
+            #define PATH_POLYLINE  (4)
+
+            // ------------ EASING FUNCTIONS ----------------
+            #define EASE_LINEAR       (0)
+            #define EASE_IN_QUAD      (1)
+            #define EASE_OUT_QUAD     (2)
+            #define EASE_IN_OUT_QUAD  (3)
+            #define EASE_IN_CUBIC     (4)
+            #define EASE_OUT_CUBIC    (5)
+            #define EASE_IN_OUT_CUBIC (6)
+            #define EASE_IN_OUT_SINE  (7)
+            #define EASE_OUT_BACK     (8)
             
 
         """
@@ -74,7 +119,111 @@ class SimpleShader(Shader):
             void processSprite(){
             
             }
+
+            // Coordinates of the values of each extension in the FS texture
+            void getExtensionCoords(int extInfo, ivec2 blockCoords, out ivec2 extCoords[NB_EXTENSIONS]){
+                int flags = extInfo & 0xFF;
+                int texel = extInfo >> 8;
+                for (int i = 0; i < NB_EXTENSIONS; i++){
+                    extCoords[i] = ivec2(blockCoords.x + texel, blockCoords.y);
+                    if ((flags & (1 << i)) != 0){
+                        texel += EXT_TEXELS[i];
+                    }
+                }
+            }
             
+            // Frame of a sprite sheet animation (from the time since the start)
+            int getAnimationFrame(float dt, int nbFrames, float fps, int loopMode){
+                int frame = int(max(dt, 0.0) * fps);
+                if (loopMode == ANIM_ONCE){
+                    return min(frame, nbFrames - 1);
+                }
+                if (loopMode == ANIM_PINGPONG && nbFrames > 1){
+                    int period = 2 * nbFrames - 2;
+                    frame = frame % period;
+                    return (frame < nbFrames) ? frame : period - frame;
+                }
+                return frame % nbFrames;
+            }
+
+            // Offset from the center of a path : the angle is in degrees (360 = one lap),
+            // fsPath contains the radius X/Y and the 2 parameters of the path
+            vec2 getPathOffset(int pathType, float angle, vec4 fsPath){
+                vec2 radius = fsPath.xy;
+                // Rectangle : each edge takes a quarter of the lap (clockwise from the top left corner)
+                if (pathType == PATH_RECTANGLE){
+                    float ratio = fract(angle / 360.0) * 4.0;
+                    int   edge  = int(ratio) % 4;
+                    float f     = 2.0 * fract(ratio) - 1.0;
+                    if (edge == 0){
+                        return vec2( f, -1.0) * radius;
+                    }
+                    if (edge == 1){
+                        return vec2( 1.0,  f) * radius;
+                    }
+                    if (edge == 2){
+                        return vec2(-f,  1.0) * radius;
+                    }
+                    return vec2(-1.0, -f) * radius;
+                }
+                // Polyline : the points are stored in another block (texel coords in param 0/1),
+                // the first texel contains the number of points, then 2 points per texel
+                if (pathType == PATH_POLYLINE){
+                    ivec2 ptsCoords = ivec2(fsPath.zw);
+                    int   nbPoints  = int(texelFetch( fsGpuChan, ptsCoords, 0 ).x);
+                    float ratio     = fract(angle / 360.0) * float(nbPoints);
+                    int   i0        = min(int(ratio), nbPoints - 1);
+                    int   i1        = (i0 + 1) % nbPoints;
+                    vec4  t0        = texelFetch( fsGpuChan, ptsCoords + ivec2(1 + i0/2, 0), 0 );
+                    vec4  t1        = texelFetch( fsGpuChan, ptsCoords + ivec2(1 + i1/2, 0), 0 );
+                    vec2  p0        = ((i0 & 1) == 0) ? t0.xy : t0.zw;
+                    vec2  p1        = ((i1 & 1) == 0) ? t1.xy : t1.zw;
+                    return mix(p0, p1, ratio - float(i0)) * radius;
+                }
+                // Circle, ellipse and Lissajous curve
+                vec2 freq = (pathType == PATH_LISSAJOUS) ? fsPath.zw : vec2(1.0);
+                float rad = radians(angle);
+                return vec2(cos(freq.x * rad), sin(freq.y * rad)) * radius;
+            }
+
+            // Easing functions (t in [0, 1])
+            float ease(int easing, float t){
+                t = clamp(t, 0.0, 1.0);
+                if (easing == EASE_IN_QUAD){
+                    return t * t;
+                }
+                if (easing == EASE_OUT_QUAD){
+                    return t * (2.0 - t);
+                }
+                if (easing == EASE_IN_OUT_QUAD){
+                    return (t < 0.5) ? 2.0 * t * t : -1.0 + (4.0 - 2.0 * t) * t;
+                }
+                if (easing == EASE_IN_CUBIC){
+                    return t * t * t;
+                }
+                if (easing == EASE_OUT_CUBIC){
+                    float u = t - 1.0;
+                    return u * u * u + 1.0;
+                }
+                if (easing == EASE_IN_OUT_CUBIC){
+                    return (t < 0.5) ? 4.0 * t * t * t : (t - 1.0) * (2.0 * t - 2.0) * (2.0 * t - 2.0) + 1.0;
+                }
+                if (easing == EASE_IN_OUT_SINE){
+                    return 0.5 - 0.5 * cos(3.14159265 * t);
+                }
+                if (easing == EASE_OUT_BACK){
+                    float u = t - 1.0;
+                    return 1.0 + 2.70158 * u * u * u + 1.70158 * u * u;
+                }
+                return t;
+            }
+
+            // Ratio of a tween (easing-start time-duration)
+            float getTweenRatio(vec3 fsTween){
+                float t = (fsTween.z > 0.0) ? (systemTime - fsTween.y) / fsTween.z : 1.0;
+                return ease(int(fsTween.x), t);
+            }
+
             void processBox(){
             
             }
@@ -116,9 +265,54 @@ class SimpleShader(Shader):
                 float fsZIndex = texelFetch( fsGpuChan, fsTexelCoords, 0 ).x;
                 // Get FLIPX and FLIPY
                 vec2 fsFlip = texelFetch( fsGpuChan, fsTexelCoords, 0 ).yz;
-                // TODO : 1 remaining data for future use
+                // Get the flags and the position of the extensions
+                int fsExtInfo  = int(texelFetch( fsGpuChan, fsTexelCoords, 0 ).w);
+                int fsExtFlags = fsExtInfo & 0xFF;
                 fsTexelCoords.x += 1;
 
+                //-------------------------------------------------------------------
+                // EXTENSIONS (evaluated from the system time)
+                //-------------------------------------------------------------------
+                ivec2 extCoords[NB_EXTENSIONS];
+                if (fsExtFlags != 0){
+                    getExtensionCoords(fsExtInfo, fsCoords[0], extCoords);
+                }
+
+                // Linear motion : P + V.dt + A.dt²/2 (dt from the start time)
+                if ((fsExtFlags & EXT_MOTION) != 0){
+                    vec4  fsMotion = texelFetch( fsGpuChan, extCoords[EXT_MOTION_INDEX], 0 );
+                    float dt       = systemTime - texelFetch( fsGpuChan, extCoords[EXT_MOTION_INDEX] + ivec2(1, 0), 0 ).x;
+                    posFS += (fsMotion.xy * dt) + (0.5 * fsMotion.zw * dt * dt);
+                }
+
+                // Path : the position is the center of the path
+                if ((fsExtFlags & EXT_PATH) != 0){
+                    vec4 fsPathInfo = texelFetch( fsGpuChan, extCoords[EXT_PATH_INDEX], 0 );
+                    vec4 fsPath     = texelFetch( fsGpuChan, extCoords[EXT_PATH_INDEX] + ivec2(1, 0), 0 );
+                    float angle     = fsPathInfo.y * (systemTime - fsPathInfo.w) + fsPathInfo.z;
+                    posFS += getPathOffset(int(fsPathInfo.x), angle, fsPath);
+                }
+
+                // Tweens : the header value is the start value
+                if ((fsExtFlags & EXT_TWEEN_SCALE) != 0){
+                    vec4 fsTween = texelFetch( fsGpuChan, extCoords[EXT_TWEEN_SCALE_INDEX], 0 );
+                    scaleFS = mix(scaleFS, fsTween.x, getTweenRatio(fsTween.yzw));
+                }
+                if ((fsExtFlags & EXT_TWEEN_ANGLE) != 0){
+                    vec4 fsTween = texelFetch( fsGpuChan, extCoords[EXT_TWEEN_ANGLE_INDEX], 0 );
+                    angleFS = mix(angleFS, fsTween.x, getTweenRatio(fsTween.yzw));
+                }
+                if ((fsExtFlags & EXT_TWEEN_ALPHA) != 0){
+                    vec4 fsTween = texelFetch( fsGpuChan, extCoords[EXT_TWEEN_ALPHA_INDEX], 0 );
+                    filterColor.a = mix(filterColor.a, fsTween.x / 255.0, getTweenRatio(fsTween.yzw));
+                }
+                if ((fsExtFlags & EXT_TWEEN_COLOR) != 0){
+                    vec4 fsTween  = texelFetch( fsGpuChan, extCoords[EXT_TWEEN_COLOR_INDEX], 0 );
+                    vec4 fsTween2 = texelFetch( fsGpuChan, extCoords[EXT_TWEEN_COLOR_INDEX] + ivec2(1, 0), 0 );
+                    filterColor.rgb = mix(filterColor.rgb, fsTween.rgb / 255.0, getTweenRatio(vec3(fsTween.w, fsTween2.xy)));
+                }
+                inColor = filterColor;
+
 
                 //-------------------------------------------------------------------
                 // CHECK if this Gfx is visible or not
@@ -146,6 +340,12 @@ class SimpleShader(Shader):
                     // Get texture ID (for SPRITE)
                     float textIdFS = texelFetch( fsGpuChan, fsTexelCoords, 0 ).x;
                     fsTexelCoords.x += 1;
+                    // Sprite sheet animation : the frames are consecutive textures
+                    if ((fsExtFlags & EXT_ANIMATION) != 0){
+                        vec4  fsAnim = texelFetch( fsGpuChan, extCoords[EXT_ANIMATION_INDEX], 0 );
+                        float dt     = systemTime - texelFetch( fsGpuChan, extCoords[EXT_ANIMATION_INDEX] + ivec2(1, 0), 0 ).x;
+                        textIdFS     = fsAnim.x + float(getAnimationFrame(dt, int(fsAnim.y), fsAnim.z, int(fsAnim.w)));
+                    }
                     
                     // Get whole Atlas dimensions
                     vec2  texDim  = textureSize(atlasTextureChan,0);
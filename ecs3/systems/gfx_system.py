@@ -1,5 +1,7 @@
 from array import array
 
+from ..components.gfx import Gfx
+
 
 class GfxSystem():
 
@@ -10,6 +12,7 @@ class GfxSystem():
         GfxSystem._glData= glData
 
     # Recursive Dichotomy method to add the component at the correct place (sorted by Z)
+    # It returns the index of the component
     def _addComponent(self, ref, left, right):
         # We reached the end of the dichotomy process
         if right - left == -1:
@@ -25,28 +28,47 @@ class GfxSystem():
                 left += 1
             # add the component add the left position
             self._compByRef.insert(left, ref)
-            return
+            return left
         else:
             if newZ == curZ:
                 # Insert at the mid index
                 self._compByRef.insert(mid, ref)
-                return
+                return mid
             elif newZ > curZ:
                 # move left border
                 left = mid+1
-                self._addComponent(ref, left, right)
+                return self._addComponent(ref, left, right)
             else:
                 # move left border
                 right = mid-1
-                self._addComponent(ref, left, right)
-
-    def _genVertexBuffer(self):
-        for c in self._compByRef:
-            yield c.getBlockID()
+                return self._addComponent(ref, left, right)
 
     def __init__(self):
         # Store components (by Ref, sorted by Z Index)
         self._compByRef  = []
+        # Index of each component in the list : built on demand when a block ID
+        # has changed, and invalidated when the components are added/removed
+        # (a defragmentation moves many blocks, each one must not cost O(N))
+        self._indexByRef = None
+        # The vertex buffer (block IDs, same order as the components) is kept
+        # up to date when a component is added/removed, or when its Z index
+        # or its block ID has changed : only the modified range of indexes
+        # [start, end[ is copied into the GPU buffer during the next render
+        self._vb         = array("I")
+        self._vbDirty    = False
+        self._vbStart    = 0
+        self._vbEnd      = 0
+        # Next component to check for the placement (round robin)
+        self._placementIndex = 0
+
+    # Add the range [start, end[ to the modified indexes of the vertex buffer
+    def _setVBDirty(self, start, end):
+        if not self._vbDirty or self._vbStart >= self._vbEnd:
+            self._vbStart, self._vbEnd = start, end
+        elif start < end:
+            self._vbStart = min(self._vbStart, start)
+            self._vbEnd   = max(self._vbEnd  , end  )
+        self._vbDirty = True
 
     def addComponent(self, ref):
         #print(f"Adding {ref.getName()} @ Z={ref.getZIndex()} ...")
@@ -54,27 +76,67 @@ class GfxSystem():
             raise RuntimeError(f"[ERROR] cannot add the Gfx {ref} twice !")
         if len(self._compByRef) == 0:
             self._compByRef.append(ref)
+            index = 0
         else:
-            self._addComponent(ref, 0, len(self._compByRef)-1)
+            index = self._addComponent(ref, 0, len(self._compByRef)-1)
+        # The next block IDs are shifted
+        self._vb.insert(index, ref.getBlockID())
+        self._indexByRef = None
+        self._setVBDirty(index, len(self._vb))
 
     def removeComponent(self, ref):
         if ref not in self._compByRef:
             raise RuntimeError(f"[ERROR] cannot remove the Gfx {ref} !")
-        self._compByRef.remove(ref)
+        index = self._compByRef.index(ref)
+        del self._compByRef[index]
+        # The next block IDs are shifted
+        del self._vb[index]
+        self._indexByRef = None
+        self._setVBDirty(index, len(self._vb))
 
     def notifyChangeZ(self, ref):
         # Remove the component and add it once again
         self.removeComponent(ref)
         self.addComponent(ref)
 
+    def notifyChangeBlockID(self, ref):
+        # The block of this component has been moved in the GPU file system
+        if self._indexByRef == None:
+            self._indexByRef = {comp: i for i, comp in enumerate(self._compByRef)}
+        index = self._indexByRef[ref]
+        self._vb[index] = ref.getBlockID()
+        self._setVBDirty(index, index + 1)
+
+    # Check the write frequency of a part of the components each frame, so that
+    # each component is checked once per placement period (round robin)
+    def _checkPlacements(self):
+        N = len(self._compByRef)
+        if N == 0 or not Gfx.AUTO_PLACEMENT:
+            return
+        start = self._placementIndex
+        if start >= N:
+            start = 0
+        end = min(N, start + (N + Gfx.PLACEMENT_PERIOD - 1) // Gfx.PLACEMENT_PERIOD)
+        for i in range(start, end):
+            self._compByRef[i].checkPlacement()
+        self._placementIndex = end
+
     def update(self, deltaTime, systemTime):
-        # Update all the gfx components
-        for c in self._compByRef:
-            c.update(deltaTime)
+        # The Gfx extensions (motion, ...) start from the current system time
+        Gfx.setSystemTime(systemTime)
+        # Migrate the gfx according to their write frequency (before the flush,
+        # so the moved blocks are written during this frame)
+        self._checkPlacements()
+        # The components are not polled : the modified gfx have set their slot
+        # in the dirty bitmap of their store, and only those slots are copied
+        # into the GPU file system (one gather per gfx store, a few texture writes)
+        Gfx.flushAll()
         # Update the GPU file system
         GfxSystem._glData.update(deltaTime, systemTime)
 
     def render(self):
-        vb = array("l", self._genVertexBuffer())
-        GfxSystem._glData.updateVertexBuffer( vb, len(self._compByRef) )
+        # No work on the components when nothing has changed
+        if self._vbDirty:
+            GfxSystem._glData.updateVertexBuffer(self._vb, len(self._vb), self._vbStart, self._vbEnd)
+            self._vbDirty = False
         GfxSystem._glData.render()
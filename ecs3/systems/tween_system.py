@@ -0,0 +1,56 @@
+import heapq
+
+from ..components.tween import Tween
+
+
+class TweenSystem():
+
+    # The tweens are interpolated by the shader : the system only keeps the
+    # running tweens sorted by end time (heap), so each update only looks at
+    # the tweens that are over, and completes them (end value written once
+    # into the Gfx, callback called). The scripts never need to poll them
+    def __init__(self):
+        self._heap = []
+        # Insertion counter (tweens ending at the same time)
+        self._seq  = 0
+        # Scheduled end time of each tween : the heap entries with another
+        # end time are outdated (the tween has been restarted since)
+        self._endTimes = {}
+
+    def _schedule(self, ref):
+        endTime = ref.getEndTime()
+        if self._endTimes.get(ref) == endTime:
+            return
+        self._endTimes[ref] = endTime
+        self._seq += 1
+        heapq.heappush(self._heap, (endTime, self._seq, ref))
+
+    def addComponent(self, ref):
+        if not ref.isRunning():
+            ref.start()
+        self._schedule(ref)
+
+    def removeComponent(self, ref):
+        ref.cancel()
+
+    # A tween has been (re)started : it may end sooner or later than before
+    def notifyTweenStart(self, ref):
+        self._schedule(ref)
+
+    def getNbRunning(self):
+        return len(self._endTimes)
+
+    def update(self, deltaTime, systemTime):
+        heap = self._heap
+        while len(heap) > 0 and heap[0][0] <= systemTime:
+            endTime, seq, ref = heapq.heappop(heap)
+            # Outdated entries (restarted tweens) are skipped
+            if self._endTimes.get(ref) != endTime:
+                continue
+            del self._endTimes[ref]
+            # Cancelled tweens are skipped (a tween restarted outside
+            # of a scene has not been notified : it is scheduled again)
+            if ref.isRunning() and ref.getEndTime() == endTime:
+                ref.complete()
+            elif ref.isRunning():
+                self._schedule(ref)
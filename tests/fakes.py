@@ -0,0 +1,96 @@
+import array
+
+from ecs3.gpu.fsgpu_bench import FakeContext, FakeTexture, FakeBuffer, FakeFence
+
+
+# Texture keeping a copy of the written texels (one array of values per row)
+class RecordingTexture(FakeTexture):
+
+    def __init__(self, size, components, dtype="f4"):
+        super().__init__(size, components, dtype)
+        self.rows = [array.array("f", bytes(4 * size[0] * components)) for y in range(size[1])]
+
+    def write(self, data, viewport=None, level=0, alignment=1):
+        super().write(data, viewport, level, alignment)
+        x, y, w, h = viewport if viewport != None else (0, 0, self.size[0], self.size[1])
+        N = w * self.components
+        values = array.array("f")
+        if isinstance(data, RecordingBuffer):
+            # A pixel buffer is read from its beginning
+            values.frombytes(bytes(data.data[:4 * N * h]))
+        else:
+            values.frombytes(memoryview(data).cast("B"))
+        for i in range(h):
+            self.rows[y + i][x * self.components:x * self.components + N] = values[i * N:(i + 1) * N]
+
+    # Values of the texture from the texel (x, y)
+    def read(self, x, y, length):
+        start = x * self.components
+        return list(self.rows[y][start:start + length])
+
+
+# Pixel buffer keeping a copy of the written bytes
+class RecordingBuffer(FakeBuffer):
+
+    def __init__(self, reserve=0):
+        super().__init__(reserve)
+        self.data = bytearray(reserve)
+
+    def write(self, data, offset=0):
+        super().write(data, offset)
+        data = memoryview(data).cast("B")
+        self.data[offset:offset + data.nbytes] = data
+
+
+class RecordingContext(FakeContext):
+
+    def __init__(self):
+        super().__init__()
+        self.fences = []
+
+    def texture(self, size, components, data=None, dtype="f1"):
+        return RecordingTexture(size, components, dtype)
+
+    def buffer(self, data=None, reserve=0, dynamic=False):
+        self.nbBuffers += 1
+        return RecordingBuffer(reserve)
+
+    def fence(self):
+        self.nbFences += 1
+        self.fences.append(FakeFence())
+        return self.fences[-1]
+
+
+# Context without sync objects (the upload ring orphans its buffers instead)
+class NoFenceContext():
+
+    def __init__(self):
+        self._ctx = RecordingContext()
+
+    def __getattr__(self, name):
+        if name == "fence":
+            raise AttributeError(name)
+        return getattr(self._ctx, name)
+
+
+# Stand-in for the loader : all the textures are 32x48
+class FakeLoader():
+
+    def getTextureByName(self, name):
+        return {"id": 0, "w": 32, "h": 48}
+
+
+# Stand-in for the OpenGL data of the Gfx system
+class FakeGlData():
+
+    def __init__(self):
+        self.nbSprites = 0
+
+    def update(self, deltaTime, systemTime):
+        pass
+
+    def updateVertexBuffer(self, data, nbSprites, start=0, end=None):
+        self.nbSprites = nbSprites
+
+    def render(self):
+        pass
@@ -0,0 +1,41 @@
+import unittest
+
+from ecs3.gpu.fsgpu_main  import FsGpuMain
+from ecs3.gpu.fsgpu_bench import FakeContext
+
+
+class TestFsGpuGrowth(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = (FsGpuMain.GROWABLE, FsGpuMain.SHRINK_OCCUPANCY, FsGpuMain.SHRINK_DELAY)
+        FsGpuMain.GROWABLE         = True
+        FsGpuMain.SHRINK_OCCUPANCY = 0.25
+        FsGpuMain.SHRINK_DELAY     = 3
+
+    def tearDown(self):
+        FsGpuMain.GROWABLE, FsGpuMain.SHRINK_OCCUPANCY, FsGpuMain.SHRINK_DELAY = self._saved
+
+    def _assertUsedSize(self, fs):
+        self.assertEqual(fs._usedSize, sum(buf.getUsedSize() for buf in fs._pages))
+
+    # The used size is maintained by the operations (not computed each frame),
+    # and the file system shrinks back after a period of low occupancy
+    def test_grow_then_shrink(self):
+        fs = FsGpuMain(FakeContext(), 256, 2)
+        fs.addSlabSize(20)
+        ids  = [fs.alloc(20, 1) for i in range(100)]
+        ids += fs.allocMany(20, 60, 1)
+        ids  = [fs.realloc(blockID, 28) if i % 7 == 3 else blockID for i, blockID in enumerate(ids)]
+        self._assertUsedSize(fs)
+        self.assertGreater(fs.getNbPages(), 2)
+        for blockID in ids[2:]:
+            fs.free(blockID)
+        self._assertUsedSize(fs)
+        for frame in range(10 * FsGpuMain.SHRINK_DELAY):
+            fs.update(1/60)
+        self.assertEqual(fs.getNbPages(), 2)
+        self._assertUsedSize(fs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from ecs3.gpu.fsgpu_main   import FsGpuMain
+from ecs3.gpu.fsgpu_buffer import FsGpuBuffer
+from ecs3.gpu.fsgpu_bench  import FakeContext
+
+
+class TestFsGpuScrub(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = FsGpuBuffer.CHECK_INTEGRITY
+
+    def tearDown(self):
+        FsGpuBuffer.CHECK_INTEGRITY = self._saved
+
+    def _createFS(self):
+        fs  = FsGpuMain(FakeContext(), 2048, 2)
+        ids = [fs.alloc(100, 1) for i in range(10)]
+        fs.free(ids[3])
+        return fs, ids
+
+    # Without the integrity check, the headers have no checksum (CHCK=0)
+    # and the scrubber still checks the lengths
+    def test_scrub_without_checksum(self):
+        FsGpuBuffer.CHECK_INTEGRITY = False
+        fs, ids = self._createFS()
+        self.assertEqual(fs._pages[0].getData()[FsGpuBuffer.CHCK], 0)
+        self.assertIsNone(fs.scrub(1000))
+        fs._pages[0].getData()[(ids[5] & 0xFFFF) + FsGpuBuffer.LENG] = 3
+        self.assertIn("bad block length", fs.scrub(1000))
+
+    def test_scrub_with_checksum(self):
+        FsGpuBuffer.CHECK_INTEGRITY = True
+        fs, ids = self._createFS()
+        self.assertIsNone(fs.scrub(1000))
+        fs._pages[0].getData()[(ids[5] & 0xFFFF) + FsGpuBuffer.TYPE] += 1
+        self.assertIn("bad checksum", fs.scrub(1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import array
+import os
+import random
+import tempfile
+import unittest
+
+from ecs3.gpu.fsgpu_main  import FsGpuMain
+from ecs3.gpu.fsgpu_bench import FakeContext
+
+
+class TestFsGpuSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = (FsGpuMain.USE_LOCAL_FS_BUFFER, FsGpuMain.GROWABLE)
+        FsGpuMain.USE_LOCAL_FS_BUFFER = True
+        FsGpuMain.GROWABLE            = True
+        fd, self.path = tempfile.mkstemp(suffix=".bin")
+        os.close(fd)
+
+    def tearDown(self):
+        FsGpuMain.USE_LOCAL_FS_BUFFER, FsGpuMain.GROWABLE = self._saved
+        os.remove(self.path)
+
+    def _createFS(self, nbPages):
+        fs = FsGpuMain(FakeContext(), 1024, nbPages)
+        fs.addSlabSize(24)
+        return fs
+
+    # The blocks and the free tables are restored, and the runtime state
+    # of the previous storage is reset
+    def test_save_load(self):
+        fs    = self._createFS(8)
+        rng   = random.Random(2)
+        alive = {}
+        for frame in range(50):
+            for i in range(rng.randint(0, 10)):
+                values = array.array("f", [rng.random() for k in range(rng.choice([24, 24, 100, 300]))])
+                alive[fs.alloc(len(values), 1, data=values, placement=rng.randrange(3))] = values
+            for i in range(min(len(alive), rng.randint(0, 8))):
+                blockID = rng.choice(list(alive))
+                del alive[blockID]
+                fs.free(blockID)
+        fs.save(self.path)
+
+        fs2 = self._createFS(2)
+        fs2._scrubError         = "[ERROR] FS corruption page=0 (previous storage)"
+        fs2._scrubPage          = 1
+        fs2._lowOccupancyFrames = 10
+        fs2.load(self.path)
+        self.assertEqual(fs2.getNbPages(), fs.getNbPages())
+        for blockID, values in alive.items():
+            offset, page = fs2._explodeID(blockID)
+            self.assertEqual(list(fs2._pages[page].read(offset))[:len(values)], list(values))
+        self.assertIsNone(fs2.getScrubError())
+        self.assertEqual(fs2._scrubPage, 0)
+        self.assertEqual(fs2._lowOccupancyFrames, 0)
+        self.assertEqual(fs2._initNbPages, fs.getNbPages())
+        self.assertIsNone(fs2.scrub(100000))
+
+
+if __name__ == "__main__":
+    unittest.main()
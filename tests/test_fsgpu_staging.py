@@ -0,0 +1,41 @@
+import unittest
+
+from ecs3.gpu.fsgpu_main import FsGpuMain
+from fakes import RecordingContext
+
+
+class TestFsGpuStaging(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = (FsGpuMain.USE_LOCAL_FS_BUFFER, FsGpuMain.USE_STAGING)
+        FsGpuMain.USE_LOCAL_FS_BUFFER = True
+        FsGpuMain.USE_STAGING         = True
+        self.fs = FsGpuMain(RecordingContext(), 256, 4)
+        self.fs.addSlabSize(20)
+
+    def tearDown(self):
+        FsGpuMain.USE_LOCAL_FS_BUFFER, FsGpuMain.USE_STAGING = self._saved
+
+    # A page formatted as a slab before the render step
+    # must still upload the parts written before
+    def test_page_swap_keeps_dirty_spans(self):
+        data    = [float(i) for i in range(100)]
+        blockID = self.fs.alloc(100, 1, data=data)
+        x, page = self.fs.getTexelCoords(blockID)
+        self.fs.free(blockID)
+        ids = [self.fs.alloc(20, 1, data=[1.0] * 20) for i in range(2)]
+        self.assertEqual(self.fs._explodeID(ids[0])[1], page)
+        self.fs.render()
+        # The texture matches the local page buffer (except the slot headers that are not uploaded)
+        slab     = self.fs._pages[page]
+        slotSize = slab.getSlotSize()
+        start    = x * 4
+        texels   = self.fs.getTexture().read(x, page, 104)
+        local    = slab.getData()[start:start + 104]
+        for i in range(104):
+            if (start + i) % slotSize >= 4:
+                self.assertEqual(texels[i], local[i])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import array
+import unittest
+
+from ecs3.gpu.fsgpu_main   import FsGpuMain
+from ecs3.gpu.fsgpu_upload import FsGpuUploadRing
+from fakes import RecordingContext, NoFenceContext
+
+
+class TestFsGpuUploadRing(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = (FsGpuMain.USE_LOCAL_FS_BUFFER, FsGpuMain.USE_STAGING, FsGpuMain.USE_UPLOAD_RING)
+
+    def tearDown(self):
+        FsGpuMain.USE_LOCAL_FS_BUFFER, FsGpuMain.USE_STAGING, FsGpuMain.USE_UPLOAD_RING = self._saved
+
+    # Upload two spans per frame (with different values each frame)
+    # and check they are in the texture at their texel offsets
+    def _uploadFrames(self, ctx, nbFrames):
+        texture = ctx.texture((16, 4), 4, dtype="f4")
+        ring    = FsGpuUploadRing(ctx, nbFrames=2)
+        for frame in range(nbFrames):
+            ring.beginFrame()
+            spans = {(3, 1, 2, 1): [frame + i for i in range(8)],
+                     (0, 2, 16, 1): [-frame - i for i in range(64)]}
+            for viewport, values in spans.items():
+                ring.upload(texture, array.array("f", values), viewport)
+            ring.endFrame()
+            for (x, y, w, h), values in spans.items():
+                self.assertEqual(texture.read(x, y, w * 4), values)
+        return ring
+
+    def test_ring_with_fences(self):
+        ctx  = RecordingContext()
+        ring = self._uploadFrames(ctx, 5)
+        # One pool of 2 buffers per frame of the ring, used again after its fence
+        self.assertEqual(ctx.nbBuffers, 4)
+        self.assertEqual(ring.getNbBuffers(), 4)
+        self.assertEqual(ctx.nbFences, 5)
+        self.assertEqual([fence.nbWaits for fence in ctx.fences], [1, 1, 1, 0, 0])
+
+    def test_ring_orphan_without_fences(self):
+        ctx  = NoFenceContext()
+        ring = self._uploadFrames(ctx, 5)
+        self.assertEqual(ctx.nbBuffers, 4)
+        self.assertEqual(ctx.nbFences, 0)
+        for pool in ring._pools:
+            for buffer in pool:
+                self.assertGreater(buffer.nbOrphans, 0)
+
+    # The dirty spans of the file system go through the ring
+    def test_fs_upload_through_ring(self):
+        FsGpuMain.USE_LOCAL_FS_BUFFER = True
+        FsGpuMain.USE_STAGING         = True
+        FsGpuMain.USE_UPLOAD_RING     = True
+        for ctx in (RecordingContext(), NoFenceContext()):
+            fs  = FsGpuMain(ctx, 256, 4)
+            values = [[float(i * 100 + k) for k in range(20)] for i in range(30)]
+            ids    = [fs.alloc(20, 1, data=values[i]) for i in range(30)]
+            fs.render()
+            values[7][8:12] = [7.5] * 4
+            fs.write2Texture(ids[7], values[7][8:12], 8)
+            fs.render()
+            for i in range(30):
+                x, y = fs.getTexelCoords(ids[i])
+                self.assertEqual(fs.getTexture().read(x, y, 20), values[i])
+            self.assertGreater(ctx.nbBuffers, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+from ecs3.gpu.fsgpu_main     import FsGpuMain
+from ecs3.components.gfx     import Gfx, GfxSprite
+from ecs3.systems.gfx_system import GfxSystem
+from fakes import RecordingContext, FakeLoader, FakeGlData
+
+
+class TestGfxPlacement(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = (FsGpuMain.USE_LOCAL_FS_BUFFER, Gfx.AUTO_PLACEMENT, Gfx.PLACEMENT_PERIOD)
+        FsGpuMain.USE_LOCAL_FS_BUFFER = False
+        Gfx.AUTO_PLACEMENT   = True
+        Gfx.PLACEMENT_PERIOD = 1
+        self.fs = FsGpuMain(RecordingContext(), 4096, 4)
+        self.fs.addSlabSize(GfxSprite.NB_VALUES)
+        Gfx.setLoader(FakeLoader())
+        Gfx.setFsGPU(self.fs)
+        GfxSystem.setOpenGlData(FakeGlData())
+
+    def tearDown(self):
+        FsGpuMain.USE_LOCAL_FS_BUFFER, Gfx.AUTO_PLACEMENT, Gfx.PLACEMENT_PERIOD = self._saved
+
+    def _getTexels(self, gfx):
+        x, y = self.fs.getTexelCoords(gfx.getBlockID())
+        return self.fs.getTexture().read(x, y, gfx.getDataSize())
+
+    # A dynamic Gfx not written during a period becomes static : its new block
+    # must contain its values in the frame of the migration (no local FS buffer)
+    def test_migrated_gfx_written_in_same_frame(self):
+        system = GfxSystem()
+        gfx = GfxSprite("sprite", x=12.0, y=34.0)
+        gfx.setColor((10, 20, 30, 40))
+        system.addComponent(gfx)
+        blockID = gfx.getBlockID()
+        for frame in range(3):
+            system.update(1/60, frame/60)
+            if gfx.getPlacement() == Gfx.PLACEMENT_STATIC:
+                break
+        self.assertEqual(gfx.getPlacement(), Gfx.PLACEMENT_STATIC)
+        self.assertNotEqual(gfx.getBlockID(), blockID)
+        self.assertEqual(self._getTexels(gfx), list(gfx._data))
+
+    # A Gfx animated by the shader is never written, but it must stay dynamic
+    def test_animated_gfx_not_migrated(self):
+        system = GfxSystem()
+        gfx = GfxSprite("sprite", x=12.0, y=34.0)
+        gfx.setMotion(10.0, 0.0)
+        system.addComponent(gfx)
+        blockID = gfx.getBlockID()
+        for frame in range(3):
+            system.update(1/60, frame/60)
+        self.assertEqual(gfx.getPlacement(), Gfx.PLACEMENT_DYNAMIC)
+        self.assertEqual(gfx.getBlockID(), blockID)
+
+    def test_resized_gfx_written_at_once(self):
+        self.fs.addSlabSize(GfxSprite.NB_VALUES + 8)
+        gfx = GfxSprite("sprite", x=12.0, y=34.0)
+        Gfx.flushAll()
+        gfx.setDataSize(GfxSprite.NB_VALUES + 8)
+        self.assertEqual(self._getTexels(gfx), list(gfx._data))
+
+
+if __name__ == "__main__":
+    unittest.main()
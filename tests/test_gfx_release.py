@@ -0,0 +1,61 @@
+import unittest
+
+from ecs3.gpu.fsgpu_main     import FsGpuMain
+from ecs3.components.gfx     import Gfx, GfxSprite
+from ecs3.systems.gfx_system import GfxSystem
+from ecs3.main.entity        import Entity
+from ecs3.main.scene         import Scene
+from fakes import RecordingContext, FakeLoader, FakeGlData
+
+
+class TestGfxRelease(unittest.TestCase):
+
+    def setUp(self):
+        self._saved = FsGpuMain.USE_LOCAL_FS_BUFFER
+        FsGpuMain.USE_LOCAL_FS_BUFFER = False
+        self.fs = FsGpuMain(RecordingContext(), 4096, 4)
+        self.fs.addSlabSize(GfxSprite.NB_VALUES)
+        Gfx.setLoader(FakeLoader())
+        Gfx.setFsGPU(self.fs)
+        GfxSystem.setOpenGlData(FakeGlData())
+
+    def tearDown(self):
+        FsGpuMain.USE_LOCAL_FS_BUFFER = self._saved
+
+    def _getTexels(self, blockID):
+        x, y = self.fs.getTexelCoords(blockID)
+        return self.fs.getTexture().read(x, y, GfxSprite.NB_VALUES)
+
+    # A Gfx modified then released before the flush must not write its old block
+    def test_released_gfx_not_written(self):
+        scene  = Scene()
+        entity = Entity()
+        scene.addEntity(entity)
+        gfx = GfxSprite("sprite", x=12.0, y=34.0)
+        entity.addComponent(gfx)
+        scene.updateWorld(1/60)
+        blockID = gfx.getBlockID()
+        store   = gfx.getStore()
+        nbSlots = store.getNbSlots()
+        texels  = self._getTexels(blockID)
+        gfx.setPosition(56.0, 78.0)
+        entity.removeComponent(gfx)
+        gfx.release()
+        scene.updateWorld(1/60)
+        self.assertEqual(self._getTexels(blockID), texels)
+        self.assertNotIn(blockID, Gfx._gfxByBlockID)
+        self.assertEqual(store.getNbSlots(), nbSlots - 1)
+        self.assertEqual(scene._world._gfxSys._compByRef, [])
+
+    def test_release_in_scene(self):
+        scene  = Scene()
+        entity = Entity()
+        scene.addEntity(entity)
+        gfx = GfxSprite("sprite")
+        entity.addComponent(gfx)
+        with self.assertRaises(RuntimeError):
+            gfx.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
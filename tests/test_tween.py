@@ -0,0 +1,62 @@
+import unittest
+
+from ecs3.gpu.fsgpu_main     import FsGpuMain
+from ecs3.components.gfx     import Gfx, GfxSprite
+from ecs3.components.tween   import Tween
+from ecs3.systems.gfx_system import GfxSystem
+from ecs3.main.entity        import Entity
+from ecs3.main.scene         import Scene
+from fakes import RecordingContext, FakeLoader, FakeGlData
+
+
+class TestTween(unittest.TestCase):
+
+    def setUp(self):
+        self.fs = FsGpuMain(RecordingContext(), 4096, 4)
+        self.fs.addSlabSize(GfxSprite.NB_VALUES)
+        Gfx.setLoader(FakeLoader())
+        Gfx.setFsGPU(self.fs)
+        Gfx.setSystemTime(0.0)
+        GfxSystem.setOpenGlData(FakeGlData())
+        self.scene  = Scene()
+        self.entity = Entity()
+        self.scene.addEntity(self.entity)
+        self.done   = []
+
+    def _update(self, deltaTime):
+        self.scene.updateWorld(deltaTime)
+
+    # A finished tween started once again must be completed (and call back) once again
+    def test_restart_done_tween(self):
+        gfx   = GfxSprite("sprite")
+        tween = Tween(gfx, Tween.SCALE, 2.0, 1.0, callback=self.done.append)
+        self.entity.addComponent(gfx)
+        self.entity.addComponent(tween)
+        self._update(1.5)
+        self.assertTrue(tween.isDone())
+        self.assertEqual(self.done, [tween])
+        tween.start()
+        self.assertTrue(tween.isRunning())
+        self._update(0.5)
+        self.assertTrue(tween.isRunning())
+        self._update(1.0)
+        self.assertTrue(tween.isDone())
+        self.assertEqual(self.done, [tween, tween])
+
+    # A running tween restarted with an earlier start time ends at its new end time
+    def test_restart_running_tween_sooner(self):
+        gfx   = GfxSprite("sprite")
+        tween = Tween(gfx, Tween.ALPHA, 0, 10.0, callback=self.done.append)
+        self.entity.addComponent(gfx)
+        self.entity.addComponent(tween)
+        self._update(1.0)
+        tween.start(-9.0)
+        self._update(1.5)
+        self.assertTrue(tween.isDone())
+        self.assertEqual(self.done, [tween])
+        self._update(10.0)
+        self.assertEqual(self.done, [tween])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,20 +12,17 @@ class MoveCircle(Script):
         self._radius = radius
         self._speed  = speed    # degrees per second
         self._key    = keyboard
+        # The path is evaluated by the shader from the system time :
+        # the sprite position is the center of the path
+        self._gfx.setPosition(self._center[0], self._center[1])
+        self._gfx.setCirclePath(self._radius, self._speed, startTime=0.0)
 
     def updateScript(self, deltaTime, systemTime):
         # Move center according to pressed keys
         if self._key.isPressed("moveUp"):
-            self._center[1] -= 20 * 60 * deltaTime
+            self._gfx.moveY(-20 * 60 * deltaTime)
         if self._key.isPressed("moveDown"):
-            self._center[1] += 20 * 60 * deltaTime
-
-        # Set the position according to the speed and system time
-        x = math.cos(self._speed*systemTime*2*math.pi/360) * self._radius + self._center[0]
-        y = math.sin(self._speed*systemTime*2*math.pi/360) * self._radius + self._center[1]
-
-        self._gfx.setX(x)
-        self._gfx.setY(y)
+            self._gfx.moveY(20 * 60 * deltaTime)
 
 
 
@@ -38,32 +35,17 @@ class MoveSquare(Script):
         self._radius = radius
         self._speed  = speed    # degrees per second
         self._key    = keyboard
+        # The path is evaluated by the shader from the system time :
+        # the sprite position is the center of the path
+        self._gfx.setPosition(self._center[0], self._center[1])
+        self._gfx.setRectanglePath(self._radius, self._radius, self._speed, startTime=0.0)
 
     def updateScript(self, deltaTime, systemTime):
         # Move center according to pressed keys
         if self._key.isPressed("moveLeft"):
-            self._center[0] -= 20 * 60 * deltaTime
+            self._gfx.moveX(-20 * 60 * deltaTime)
         if self._key.isPressed("moveRight"):
-            self._center[0] += 20 * 60 * deltaTime
-
-        # Set the position according to the speed and system time
-        ratio = self._speed*systemTime/360
-        ratio = ratio - int(ratio)
-        if ratio <0.25:
-            x = 2*self._radius * ratio *4 - self._radius + self._center[0]
-            y = - self._radius + self._center[1]
-        elif ratio < 0.5:
-            y = 2 * self._radius * (ratio-0.25) * 4 - self._radius + self._center[1]
-            x = self._radius + self._center[0]
-        elif ratio < 0.75:
-            y = self._radius + self._center[1]
-            x = - 2*self._radius * (ratio-0.5) *4 + self._radius + self._center[0]
-        else:
-            x = - self._radius + self._center[0]
-            y = - 2 * self._radius * (ratio-0.75) * 4 + self._radius + self._center[1]
-
-        self._gfx.setX(x)
-        self._gfx.setY(y)
+            self._gfx.moveX(20 * 60 * deltaTime)
 
 
 class ShowHide(Script):